@@ -0,0 +1,291 @@
+"""
+API HTTP/JSON local para ingestão de gastos.
+
+Permite que scripts (ex.: leitores de extrato bancário) adicionem gastos sem
+passar pelo formulário do Streamlit. As escritas entram numa fila limitada e
+uma única tarefa gravadora agrupa tudo o que chegou num intervalo curto em
+uma só transação do SQLite.
+
+Rodar o serviço: python api.py --porta 8502
+
+Endpoints:
+    POST /gastos        {"mes", "tipo", "categoria", "descricao", "valor"}
+    POST /gastos/lote   {"gastos": [...]}
+    GET  /resumo        totais de todos os meses
+    GET  /resumo/<mês>  totais do mês por tipo e categoria, com a meta
+    GET  /saude         estado do serviço e tamanho da fila
+"""
+
+import argparse
+import asyncio
+import json
+import math
+from urllib.parse import unquote
+
+from src import database
+from src.constantes import MESES, CATEGORIAS, TIPOS
+from src.database import (
+    adicionar_gastos_em_lote,
+    resumo_mes,
+    totais_por_mes,
+    obter_meta,
+)
+
+# Requisições de escrita aguardando a gravadora; com a fila cheia o serviço
+# responde 503 em vez de acumular memória sem limite.
+TAMANHO_FILA = 1000
+# Uma transação grava no máximo este número de gastos...
+GASTOS_POR_TRANSACAO = 5000
+# ...ou o que chegou durante este intervalo (segundos).
+INTERVALO_TRANSACAO = 0.005
+# Limites de uma requisição.
+MAX_GASTOS_POR_REQUISICAO = 5000
+MAX_CORPO = 4 * 1024 * 1024
+
+STATUS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class ErroRequisicao(Exception):
+    """Erro de validação que vira uma resposta HTTP com o status informado."""
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _validar_gasto(dados) -> dict:
+    """Valida um gasto recebido em JSON e retorna-o normalizado."""
+    if not isinstance(dados, dict):
+        raise ErroRequisicao(400, "Cada gasto deve ser um objeto JSON.")
+    mes = dados.get("mes")
+    if mes not in MESES:
+        raise ErroRequisicao(400, f"Mês inválido: {mes!r}")
+    tipo = dados.get("tipo")
+    if tipo not in TIPOS:
+        raise ErroRequisicao(400, f"Tipo inválido: {tipo!r}")
+    categoria = dados.get("categoria", "Outros")
+    if categoria not in CATEGORIAS:
+        raise ErroRequisicao(400, f"Categoria inválida: {categoria!r}")
+    descricao = dados.get("descricao")
+    if not isinstance(descricao, str) or not descricao.strip():
+        raise ErroRequisicao(400, "Preencha a descrição.")
+    descricao = descricao.strip()
+    valor = dados.get("valor")
+    # bool é subclasse de int, mas true/false não são valores.
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        raise ErroRequisicao(400, "Valor deve ser numérico.")
+    try:
+        valor = float(valor)
+    except ValueError:
+        raise ErroRequisicao(400, "Valor deve ser numérico.")
+    # float() aceita "nan" e "inf", que o SQLite não guarda como valor.
+    if not math.isfinite(valor):
+        raise ErroRequisicao(400, "Valor deve ser um número finito.")
+    if valor <= 0:
+        raise ErroRequisicao(400, "Valor deve ser maior que zero.")
+    return {"mes": mes, "tipo": tipo, "categoria": categoria, "descricao": descricao, "valor": valor}
+
+
+class ServicoIngestao:
+    """Servidor HTTP assíncrono com fila de escrita limitada."""
+
+    def __init__(self, tamanho_fila: int = TAMANHO_FILA):
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=tamanho_fila)
+        self.gravados = 0
+
+    # --- Gravação em lote ---
+
+    async def gravadora(self) -> None:
+        """Consome a fila e grava os gastos em transações periódicas."""
+        loop = asyncio.get_running_loop()
+        while True:
+            pendentes = [await self.fila.get()]
+            quantidade = len(pendentes[0][0])
+            prazo = loop.time() + INTERVALO_TRANSACAO
+            while quantidade < GASTOS_POR_TRANSACAO:
+                try:
+                    item = self.fila.get_nowait()
+                except asyncio.QueueEmpty:
+                    restante = prazo - loop.time()
+                    if restante <= 0:
+                        break
+                    # Dá vez às conexões para que mais gastos entrem no lote.
+                    await asyncio.sleep(min(restante, 0.002))
+                    continue
+                pendentes.append(item)
+                quantidade += len(item[0])
+
+            await self._gravar(pendentes)
+            for _ in pendentes:
+                self.fila.task_done()
+
+    async def _gravar(self, pendentes: list) -> None:
+        """Grava as requisições pendentes numa transação e responde a cada uma.
+
+        Se a transação conjunta falhar, cada requisição é regravada sozinha,
+        para que um gasto inválido não derrube os dos outros clientes.
+        """
+        lote = [g for gastos, _ in pendentes for g in gastos]
+        try:
+            ids = await asyncio.to_thread(adicionar_gastos_em_lote, lote)
+        except Exception as e:
+            if len(pendentes) == 1:
+                _, futuro = pendentes[0]
+                if not futuro.done():
+                    futuro.set_exception(e)
+                return
+            for item in pendentes:
+                await self._gravar([item])
+            return
+
+        self.gravados += len(ids)
+        inicio = 0
+        for gastos, futuro in pendentes:
+            if not futuro.done():
+                futuro.set_result(ids[inicio:inicio + len(gastos)])
+            inicio += len(gastos)
+
+    async def enfileirar(self, gastos: list[dict]) -> list[int]:
+        """Coloca os gastos na fila e aguarda o commit; retorna os IDs."""
+        futuro = asyncio.get_running_loop().create_future()
+        try:
+            self.fila.put_nowait((gastos, futuro))
+        except asyncio.QueueFull:
+            raise ErroRequisicao(503, "Fila de escrita cheia, tente novamente.")
+        return await futuro
+
+    # --- Rotas ---
+
+    async def rotear(self, metodo: str, caminho: str, corpo: bytes) -> tuple[int, dict]:
+        partes = [unquote(p) for p in caminho.split("?", 1)[0].strip("/").split("/")]
+
+        if partes == ["gastos"] or partes == ["gastos", "lote"]:
+            if metodo != "POST":
+                raise ErroRequisicao(405, "Use POST.")
+            try:
+                dados = json.loads(corpo or b"null")
+            except ValueError:
+                raise ErroRequisicao(400, "Corpo JSON inválido.")
+            if partes == ["gastos"]:
+                ids = await self.enfileirar([_validar_gasto(dados)])
+                return 201, {"id": ids[0]}
+            itens = dados.get("gastos") if isinstance(dados, dict) else dados
+            if not isinstance(itens, list) or not itens:
+                raise ErroRequisicao(400, "Envie uma lista não vazia em 'gastos'.")
+            if len(itens) > MAX_GASTOS_POR_REQUISICAO:
+                raise ErroRequisicao(413, f"Máximo de {MAX_GASTOS_POR_REQUISICAO} gastos por lote.")
+            ids = await self.enfileirar([_validar_gasto(g) for g in itens])
+            return 201, {"ids": ids}
+
+        if metodo != "GET":
+            raise ErroRequisicao(405, "Use GET.")
+        if partes == ["resumo"]:
+            totais = await asyncio.to_thread(totais_por_mes)
+            return 200, {"meses": {m: totais.get(m, 0.0) for m in MESES}}
+        if len(partes) == 2 and partes[0] == "resumo":
+            mes = partes[1]
+            if mes not in MESES:
+                raise ErroRequisicao(404, f"Mês inválido: {mes!r}")
+            resumo = await asyncio.to_thread(resumo_mes, mes)
+            resumo["meta"] = await asyncio.to_thread(obter_meta, mes)
+            resumo["mes"] = mes
+            return 200, resumo
+        if partes == ["saude"]:
+            return 200, {"status": "ok", "fila": self.fila.qsize(), "gravados": self.gravados}
+        raise ErroRequisicao(404, "Rota não encontrada.")
+
+    # --- HTTP ---
+
+    async def atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """Atende uma conexão HTTP/1.1, mantendo-a aberta entre requisições."""
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, caminho, versao = linha.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                cabecalhos = {}
+                while True:
+                    h = await leitor.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    nome, _, valor = h.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                manter = (
+                    versao == "HTTP/1.1"
+                    and cabecalhos.get("connection", "").lower() != "close"
+                )
+                try:
+                    tamanho = int(cabecalhos.get("content-length", 0) or 0)
+                except ValueError:
+                    tamanho = -1
+                if tamanho < 0:
+                    # Sem um tamanho válido não há como achar o fim do corpo.
+                    status, resposta = 400, {"erro": "Cabeçalho Content-Length inválido."}
+                    manter = False
+                elif tamanho > MAX_CORPO:
+                    status, resposta = 413, {"erro": "Corpo da requisição muito grande."}
+                    manter = False
+                else:
+                    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+                    try:
+                        status, resposta = await self.rotear(metodo, caminho, corpo)
+                    except ErroRequisicao as e:
+                        status, resposta = e.status, {"erro": str(e)}
+                    except Exception as e:
+                        status, resposta = 500, {"erro": f"Erro interno: {e}"}
+
+                dados = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+                escritor.write(
+                    f"HTTP/1.1 {status} {STATUS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(dados)}\r\n"
+                    f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode("latin-1")
+                    + dados
+                )
+                await escritor.drain()
+                if not manter:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            escritor.close()
+
+
+async def servir(host: str = "127.0.0.1", porta: int = 8502) -> None:
+    """Inicia o serviço e atende até ser cancelado."""
+    servico = ServicoIngestao()
+    gravadora = asyncio.create_task(servico.gravadora())
+    servidor = await asyncio.start_server(servico.atender, host, porta)
+    print(f"API de ingestão em http://{host}:{porta}", flush=True)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        gravadora.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API HTTP local de ingestão de gastos.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8502)
+    parser.add_argument("--banco", default=database.DB_PATH, help="Arquivo SQLite (padrão: financeiro.db)")
+    args = parser.parse_args()
+    database.DB_PATH = args.banco
+    try:
+        asyncio.run(servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -20,15 +20,19 @@ from src.database import (
     adicionar_gasto,
     remover_gasto,
     editar_gasto,
-    obter_gastos_mes,
-    obter_todos_gastos,
     limpar_tudo,
     importar_gastos,
+    obter_todos_gastos,
     salvar_configuracao,
-    obter_configuracao,
     salvar_meta,
-    obter_meta,
-    obter_todas_metas,
+    salvar_regra_categoria,
+    remover_regra_categoria,
+    obter_regras_categoria,
+    salvar_orcamento,
+    remover_orcamento,
+    avaliar_orcamentos,
+    ALERTA_ATENCAO_PADRAO,
+    ALERTA_EXCEDIDO_PADRAO,
 )
 from src.charts import (
     grafico_pizza_tipo,
@@ -37,23 +41,18 @@ from src.charts import (
     grafico_barras_categorias,
     grafico_meta_vs_gasto,
 )
+from src.backup import (
+    criar_snapshot_em_segundo_plano,
+    estado_snapshot_em_segundo_plano,
+    listar_snapshots,
+)
+from src.constantes import MESES, CATEGORIAS, TIPOS
+from src.importador import importar_extrato
+from src.livro import Livro
 
 # Configurações iniciais da página Streamlit
 st.set_page_config(layout="wide", page_title="Dashboard Financeiro", page_icon="💰")
 
-# -------------------------
-# Constantes
-# -------------------------
-MESES = [
-    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
-    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
-]
-
-CATEGORIAS = [
-    "Moradia", "Alimentação", "Transporte", "Saúde", "Educação",
-    "Lazer", "Vestuário", "Serviços", "Investimentos", "Outros",
-]
-
 # -------------------------
 # Inicialização dos estados
 # -------------------------
@@ -66,38 +65,58 @@ if "editando_id" not in st.session_state:
 if "confirmar_limpar" not in st.session_state:
     st.session_state.confirmar_limpar = False
 
-# Carregar salário do banco de dados
-salario_salvo = float(obter_configuracao("salario", "0"))
+if "memo" not in st.session_state:
+    st.session_state.memo = {}
+
+# Livro-caixa da sessão: carregado uma vez e, a cada rerun, atualizado só com
+# as alterações gravadas no banco desde a última leitura (por esta ou outra sessão)
+if "livro" not in st.session_state:
+    st.session_state.livro = Livro()
+livro = st.session_state.livro
+livro.atualizar()
+
+# Carregar salário e percentuais de alerta do banco de dados
+salario = float(livro.configuracao("salario", "0"))
+alerta_atencao = float(livro.configuracao("alerta_atencao", str(ALERTA_ATENCAO_PADRAO)))
+alerta_excedido = float(livro.configuracao("alerta_excedido", str(ALERTA_EXCEDIDO_PADRAO)))
+
+# Mensagem de uma ação que precisou recarregar a página inteira
+if "aviso" in st.session_state:
+    st.toast(st.session_state.pop("aviso"))
 
 # -------------------------
 # Funções auxiliares
 # -------------------------
 
-def somar_por_tipo(mes: str) -> tuple[float, float, float]:
-    """Soma os valores dos gastos do mês por tipo (Fixo/Variável)."""
-    gastos = obter_gastos_mes(mes)
-    fixos = sum(g["valor"] for g in gastos if g["tipo"] == "Fixo")
-    variaveis = sum(g["valor"] for g in gastos if g["tipo"] == "Variável")
-    return fixos, variaveis, fixos + variaveis
+def memorizar(nome: str, dependencias: tuple, calcular):
+    """Reaproveita o resultado de ``calcular`` enquanto as dependências não mudarem.
+
+    As dependências são as versões do livro e os demais valores que a seção
+    lê; assim um rerun só recalcula as seções com alguma entrada alterada.
+    """
+    guardado = st.session_state.memo.get(nome)
+    if guardado is None or guardado[0] != dependencias:
+        guardado = (dependencias, calcular())
+        st.session_state.memo[nome] = guardado
+    return guardado[1]
 
 
-def totais_mensais() -> dict[str, float]:
-    """Calcula o total de gastos para cada mês."""
-    todos = obter_todos_gastos()
-    totais = {m: 0.0 for m in MESES}
-    for g in todos:
-        if g["mes"] in totais:
-            totais[g["mes"]] += g["valor"]
-    return totais
+def recarregar_pagina(aviso: str = "") -> None:
+    """Reexecuta a página inteira após uma alteração que afeta outras seções."""
+    if aviso:
+        st.session_state.aviso = aviso
+    st.rerun()
 
 
 def exportar_csv() -> bytes:
     """Gera um CSV com todos os gastos e o salário atual."""
+    # Lido do banco para levar o hash_conteudo, que evita duplicar extratos
+    # já importados depois de uma restauração.
     gastos = obter_todos_gastos()
     if not gastos:
         return b""
     df = pd.DataFrame(gastos)
-    df = df[["mes", "tipo", "categoria", "descricao", "valor"]]
+    df = df[["mes", "tipo", "categoria", "descricao", "valor", "hash_conteudo"]]
     df["salario"] = salario
     return df.to_csv(index=False).encode("utf-8")
 
@@ -119,6 +138,7 @@ def importar_csv(arquivo) -> None:
                 "categoria": str(row.get("categoria", "Outros")),
                 "descricao": str(row["descricao"]),
                 "valor": float(row["valor"]),
+                "hash_conteudo": None if pd.isna(row.get("hash_conteudo")) else str(row["hash_conteudo"]),
             })
         importar_gastos(gastos)
 
@@ -132,32 +152,53 @@ def importar_csv(arquivo) -> None:
         st.error(f"Erro ao importar CSV: {e}")
 
 
+def definir_estado(chave: str, valor) -> None:
+    """Callback de botão: altera o estado antes do rerun do fragmento."""
+    st.session_state[chave] = valor
+
+
+def montar_tabela(gastos: list[dict]) -> pd.DataFrame:
+    """Tabela de exibição dos gastos, com valores formatados."""
+    df = pd.DataFrame(gastos)
+    df_display = df[["tipo", "categoria", "descricao", "valor"]].copy()
+    df_display.columns = ["Tipo", "Categoria", "Descrição", "Valor"]
+    df_display["Valor"] = df_display["Valor"].apply(lambda x: f"R$ {x:.2f}")
+    return df_display
+
+
 # -------------------------
-# Layout principal
+# Seções da página
 # -------------------------
-st.title("💰 Dashboard Financeiro")
+# Cada seção é um fragmento que recebe como argumentos os dados de que
+# depende. Interações que só mudam a própria seção (filtro, seleção de um
+# gasto, regras, snapshot) rerodam apenas o fragmento; ações que gravam
+# dados usados por outras seções recarregam a página, e as seções cujas
+# dependências não mudaram reaproveitam o que já foi calculado.
 
-# ---------- Sidebar ----------
-with st.sidebar:
+ICONES_STATUS = {"ok": "✅", "atencao": "🟡", "excedido": "⚠️"}
+GRAVIDADE = {"ok": 0, "atencao": 1, "excedido": 2}
+
+
+@st.fragment
+def barra_lateral(mes_sel: str, salario: float, alerta_atencao: float, alerta_excedido: float) -> None:
     st.header("⚙️ Configurações")
 
     novo_salario = st.number_input(
         "Salário mensal (R$)",
         min_value=0.0,
-        value=salario_salvo,
+        value=salario,
         step=100.0,
         format="%.2f",
     )
-    if novo_salario != salario_salvo:
+    if novo_salario != salario:
         salvar_configuracao("salario", str(novo_salario))
-    salario = novo_salario
+        recarregar_pagina()
 
     st.markdown("---")
 
     # --- Metas de economia ---
     st.subheader("🎯 Meta Mensal")
-    mes_sel = st.session_state.mes_selecionado
-    meta_atual = obter_meta(mes_sel)
+    meta_atual = livro.meta(mes_sel)
 
     nova_meta = st.number_input(
         f"Meta de gastos - {mes_sel} (R$)",
@@ -169,18 +210,43 @@ with st.sidebar:
     )
     if nova_meta > 0 and nova_meta != meta_atual:
         salvar_meta(mes_sel, nova_meta)
-        st.success(f"Meta de {mes_sel} atualizada!")
+        recarregar_pagina(f"Meta de {mes_sel} atualizada!")
+
+    with st.expander("Orçamentos por categoria"):
+        with st.form(key="formulario_orcamento", clear_on_submit=True):
+            orcamento_categoria = st.selectbox("Categoria", CATEGORIAS, key="orcamento_categoria")
+            orcamento_valor = st.number_input(
+                f"Limite em {mes_sel} (R$)", min_value=0.0, step=50.0, format="%.2f",
+                help="Use 0 para remover o orçamento da categoria",
+            )
+            if st.form_submit_button("Salvar orçamento", use_container_width=True):
+                if orcamento_valor > 0:
+                    salvar_orcamento(mes_sel, orcamento_categoria, orcamento_valor)
+                else:
+                    remover_orcamento(mes_sel, orcamento_categoria)
+                recarregar_pagina()
+
+        novo_atencao = st.number_input(
+            "Alerta de atenção (%)", min_value=0.0, value=alerta_atencao, step=5.0, format="%.0f",
+        )
+        novo_excedido = st.number_input(
+            "Alerta de excedido (%)", min_value=0.0, value=alerta_excedido, step=5.0, format="%.0f",
+        )
+        if novo_atencao > novo_excedido:
+            st.error("O alerta de atenção não pode ser maior que o de excedido.")
+        elif novo_atencao != alerta_atencao or novo_excedido != alerta_excedido:
+            salvar_configuracao("alerta_atencao", str(novo_atencao))
+            salvar_configuracao("alerta_excedido", str(novo_excedido))
+            recarregar_pagina()
 
     st.markdown("---")
 
     # --- Backup ---
     st.subheader("💾 Backup")
-    todos_gastos = obter_todos_gastos()
-
-    if todos_gastos:
+    if livro.gastos:
         st.download_button(
             "⬇️ Exportar CSV",
-            exportar_csv(),
+            memorizar("exportar_csv", (livro.versao("gastos"), salario), exportar_csv),
             "backup_financeiro.csv",
             "text/csv",
             use_container_width=True,
@@ -190,13 +256,69 @@ with st.sidebar:
     if arquivo_enviado and st.button("Carregar", use_container_width=True):
         importar_csv(arquivo_enviado)
 
+    # --- Snapshots do banco ---
+    if st.button("📸 Criar snapshot", use_container_width=True):
+        criar_snapshot_em_segundo_plano()
+        st.toast("Snapshot iniciado em segundo plano.")
+
+    estado_snapshot = estado_snapshot_em_segundo_plano()
+    if estado_snapshot and estado_snapshot["erro"]:
+        st.error(f"Falha no snapshot de {estado_snapshot['inicio']:%H:%M}: {estado_snapshot['erro']}")
+    elif estado_snapshot and not estado_snapshot["concluido"]:
+        st.caption("Snapshot em andamento...")
+
+    snapshots = listar_snapshots()
+    if snapshots:
+        st.caption(
+            f"Último snapshot: {snapshots[0]['data']:%d/%m/%Y %H:%M} • {len(snapshots)} mantidos"
+        )
+
+    st.markdown("---")
+
+    # --- Extratos bancários ---
+    st.subheader("🏦 Extrato Bancário")
+    extrato_enviado = st.file_uploader(
+        "Importar extrato", type=["csv", "ofx"],
+        help="Transações já importadas antes são ignoradas automaticamente",
+    )
+    if extrato_enviado and st.button("Importar extrato", use_container_width=True):
+        try:
+            resultado = importar_extrato(extrato_enviado.getvalue(), extrato_enviado.name)
+        except Exception as e:
+            st.error(f"Erro ao importar extrato: {e}")
+        else:
+            recarregar_pagina(
+                f"{resultado['inseridos']} gastos importados, "
+                f"{resultado['duplicados']} duplicados ignorados."
+            )
+
+    with st.expander("Regras de categoria"):
+        with st.form(key="formulario_regra", clear_on_submit=True):
+            padrao = st.text_input("Descrição contém", placeholder="Ex: IFOOD, UBER...")
+            regra_categoria = st.selectbox("Categoria", CATEGORIAS)
+            regra_tipo = st.selectbox("Tipo", ["Manter padrão"] + TIPOS)
+            if st.form_submit_button("Adicionar regra", use_container_width=True) and padrao.strip():
+                salvar_regra_categoria(
+                    padrao.strip(), regra_categoria,
+                    None if regra_tipo == "Manter padrão" else regra_tipo,
+                )
+
+        for regra in obter_regras_categoria():
+            col_regra, col_remover = st.columns([4, 1])
+            col_regra.caption(f'"{regra["padrao"]}" → {regra["categoria"]}')
+            col_remover.button(
+                "✖", key=f"regra_{regra['id']}",
+                on_click=remover_regra_categoria, args=(regra["id"],),
+            )
+
     st.markdown("---")
 
     # --- Limpar tudo com confirmação ---
     if not st.session_state.confirmar_limpar:
-        if st.button("🗑️ Limpar tudo", use_container_width=True):
-            st.session_state.confirmar_limpar = True
-            st.rerun()
+        st.button(
+            "🗑️ Limpar tudo", use_container_width=True,
+            on_click=definir_estado, args=("confirmar_limpar", True),
+        )
     else:
         st.warning("Tem certeza? Todos os dados serão apagados.")
         col_sim, col_nao = st.columns(2)
@@ -204,55 +326,58 @@ with st.sidebar:
             if st.button("Sim", type="primary", use_container_width=True):
                 limpar_tudo()
                 st.session_state.confirmar_limpar = False
-                st.rerun()
+                recarregar_pagina()
         with col_nao:
-            if st.button("Não", use_container_width=True):
-                st.session_state.confirmar_limpar = False
-                st.rerun()
+            st.button(
+                "Não", use_container_width=True,
+                on_click=definir_estado, args=("confirmar_limpar", False),
+            )
 
-# ---------- Seleção de mês ----------
-st.subheader("📅 Selecione o Mês")
-colunas = st.columns(4)
-
-for i, mes in enumerate(MESES):
-    with colunas[i % 4]:
-        _, _, total = somar_por_tipo(mes)
-        meta = obter_meta(mes)
-        esta_selecionado = st.session_state.mes_selecionado == mes
-
-        if st.button(
-            f"{'✓ ' if esta_selecionado else ''}{mes}",
-            key=f"btn_{mes}",
-            type="primary" if esta_selecionado else "secondary",
-            use_container_width=True,
-        ):
-            st.session_state.mes_selecionado = mes
-            st.session_state.editando_id = None
-            st.rerun()
-
-        # Mostra total e indicador de meta
-        if total > 0:
-            label = f"R$ {total:.2f}"
-            if meta and total > meta:
-                label += " ⚠️"
-            st.caption(label)
-        else:
-            st.caption("Sem gastos")
 
-st.markdown("---")
+@st.fragment
+def grade_meses(mes_selecionado: str, avaliacao: dict) -> None:
+    # Pior status entre a meta e os orçamentos de cada mês
+    pior_status = {}
+    for (mes_av, _), a in avaliacao.items():
+        if GRAVIDADE[a["status"]] > GRAVIDADE[pior_status.get(mes_av, "ok")]:
+            pior_status[mes_av] = a["status"]
+
+    st.subheader("📅 Selecione o Mês")
+    colunas = st.columns(4)
+
+    for i, mes in enumerate(MESES):
+        with colunas[i % 4]:
+            _, _, total = livro.somar_por_tipo(mes)
+            esta_selecionado = mes_selecionado == mes
+
+            if st.button(
+                f"{'✓ ' if esta_selecionado else ''}{mes}",
+                key=f"btn_{mes}",
+                type="primary" if esta_selecionado else "secondary",
+                use_container_width=True,
+            ):
+                st.session_state.mes_selecionado = mes
+                st.session_state.editando_id = None
+                st.rerun()
 
-# ---------- Área principal ----------
-selecionado = st.session_state.mes_selecionado
-st.subheader(f"📊 {selecionado}")
-col1, col2 = st.columns([2, 1])
+            # Mostra total e indicador de meta
+            if total > 0:
+                label = f"R$ {total:.2f}"
+                if mes in pior_status:
+                    label += f" {ICONES_STATUS[pior_status[mes]]}"
+                st.caption(label)
+            else:
+                st.caption("Sem gastos")
 
-with col1:
+
+@st.fragment
+def tabela_gastos(selecionado: str) -> None:
     # --- Formulário de adição ---
     st.markdown("### ➕ Adicionar Gasto")
     with st.form(key="formulario_adicionar", clear_on_submit=True):
         form_col1, form_col2 = st.columns(2)
         with form_col1:
-            tipo = st.selectbox("Tipo", ["Fixo", "Variável"])
+            tipo = st.selectbox("Tipo", TIPOS)
             descricao = st.text_input("Descrição", placeholder="Ex: Aluguel, Conta de luz...")
         with form_col2:
             categoria = st.selectbox("Categoria", CATEGORIAS)
@@ -265,102 +390,111 @@ with col1:
                 st.error("Valor deve ser maior que zero.")
             else:
                 adicionar_gasto(selecionado, tipo, categoria, descricao.strip(), valor)
-                st.success(f"Adicionado: {descricao} — R$ {valor:.2f} ({categoria})")
-                st.rerun()
+                recarregar_pagina(f"Adicionado: {descricao} — R$ {valor:.2f} ({categoria})")
 
     # --- Tabela de gastos ---
     st.markdown("### 📋 Gastos Cadastrados")
-    gastos_mes = obter_gastos_mes(selecionado)
+    versao_mes = livro.versao("gastos", selecionado)
+    gastos_mes = livro.gastos_mes(selecionado)
 
     if not gastos_mes:
         st.info("Nenhum gasto cadastrado neste mês.")
-    else:
-        # Filtro por categoria
-        categorias_presentes = sorted(set(g["categoria"] for g in gastos_mes))
-        filtro_categorias = st.multiselect(
-            "Filtrar por categoria",
-            categorias_presentes,
-            default=categorias_presentes,
-            label_visibility="collapsed",
-            placeholder="Filtrar por categoria...",
-        )
+        return
 
-        gastos_filtrados = [g for g in gastos_mes if g["categoria"] in filtro_categorias]
+    # Filtro por categoria
+    categorias_presentes = memorizar(
+        "categorias_presentes", (selecionado, versao_mes),
+        lambda: sorted(set(g["categoria"] for g in gastos_mes)),
+    )
+    filtro_categorias = st.multiselect(
+        "Filtrar por categoria",
+        categorias_presentes,
+        default=categorias_presentes,
+        label_visibility="collapsed",
+        placeholder="Filtrar por categoria...",
+    )
 
-        if gastos_filtrados:
-            df = pd.DataFrame(gastos_filtrados)
-            df_display = df[["tipo", "categoria", "descricao", "valor"]].copy()
-            df_display.columns = ["Tipo", "Categoria", "Descrição", "Valor"]
-            df_display["Valor"] = df_display["Valor"].apply(lambda x: f"R$ {x:.2f}")
-            st.dataframe(df_display, use_container_width=True, hide_index=True)
+    def filtrar() -> tuple:
+        filtrados = [g for g in gastos_mes if g["categoria"] in filtro_categorias]
+        if not filtrados:
+            return filtrados, None, []
+        opcoes = [
+            f'{g["id"]}. {g["descricao"]} - R$ {g["valor"]:.2f} ({g["categoria"]})'
+            for g in filtrados
+        ]
+        return filtrados, montar_tabela(filtrados), opcoes
+
+    gastos_filtrados, df_display, opcoes = memorizar(
+        "tabela_gastos", (selecionado, versao_mes, tuple(filtro_categorias)), filtrar,
+    )
 
-            # --- Edição de gasto ---
-            if st.session_state.editando_id is not None:
-                gasto_editando = next(
-                    (g for g in gastos_mes if g["id"] == st.session_state.editando_id), None
-                )
-                if gasto_editando:
-                    st.markdown("#### ✏️ Editando Gasto")
-                    with st.form(key="formulario_editar"):
-                        ed_col1, ed_col2 = st.columns(2)
-                        with ed_col1:
-                            ed_tipo = st.selectbox(
-                                "Tipo", ["Fixo", "Variável"],
-                                index=["Fixo", "Variável"].index(gasto_editando["tipo"]),
-                            )
-                            ed_descricao = st.text_input("Descrição", value=gasto_editando["descricao"])
-                        with ed_col2:
-                            ed_categoria = st.selectbox(
-                                "Categoria", CATEGORIAS,
-                                index=CATEGORIAS.index(gasto_editando["categoria"])
-                                if gasto_editando["categoria"] in CATEGORIAS else len(CATEGORIAS) - 1,
-                            )
-                            ed_valor = st.number_input(
-                                "Valor (R$)", min_value=0.01, value=gasto_editando["valor"], format="%.2f",
-                            )
-
-                        btn_col1, btn_col2 = st.columns(2)
-                        with btn_col1:
-                            if st.form_submit_button("💾 Salvar", use_container_width=True):
-                                editar_gasto(
-                                    st.session_state.editando_id,
-                                    ed_tipo, ed_categoria, ed_descricao.strip(), ed_valor,
-                                )
-                                st.session_state.editando_id = None
-                                st.success("Gasto atualizado!")
-                                st.rerun()
-                        with btn_col2:
-                            if st.form_submit_button("❌ Cancelar", use_container_width=True):
-                                st.session_state.editando_id = None
-                                st.rerun()
-
-            # --- Ações: editar e remover ---
-            opcoes = [
-                f'{g["id"]}. {g["descricao"]} - R$ {g["valor"]:.2f} ({g["categoria"]})'
-                for g in gastos_filtrados
-            ]
-            selecionado_gasto = st.selectbox(
-                "Selecione um gasto", ["Selecione..."] + opcoes, label_visibility="collapsed",
+    if not gastos_filtrados:
+        st.info("Nenhum gasto encontrado para os filtros selecionados.")
+        return
+
+    st.dataframe(df_display, use_container_width=True, hide_index=True)
+
+    # --- Edição de gasto ---
+    if st.session_state.editando_id is not None:
+        gasto_editando = livro.gastos.get(st.session_state.editando_id)
+        if gasto_editando and gasto_editando["mes"] == selecionado:
+            st.markdown("#### ✏️ Editando Gasto")
+            with st.form(key="formulario_editar"):
+                ed_col1, ed_col2 = st.columns(2)
+                with ed_col1:
+                    ed_tipo = st.selectbox(
+                        "Tipo", TIPOS,
+                        index=TIPOS.index(gasto_editando["tipo"]),
+                    )
+                    ed_descricao = st.text_input("Descrição", value=gasto_editando["descricao"])
+                with ed_col2:
+                    ed_categoria = st.selectbox(
+                        "Categoria", CATEGORIAS,
+                        index=CATEGORIAS.index(gasto_editando["categoria"])
+                        if gasto_editando["categoria"] in CATEGORIAS else len(CATEGORIAS) - 1,
+                    )
+                    ed_valor = st.number_input(
+                        "Valor (R$)", min_value=0.01, value=gasto_editando["valor"], format="%.2f",
+                    )
+
+                btn_col1, btn_col2 = st.columns(2)
+                with btn_col1:
+                    if st.form_submit_button("💾 Salvar", use_container_width=True):
+                        editar_gasto(
+                            st.session_state.editando_id,
+                            ed_tipo, ed_categoria, ed_descricao.strip(), ed_valor,
+                        )
+                        st.session_state.editando_id = None
+                        recarregar_pagina("Gasto atualizado!")
+                with btn_col2:
+                    st.form_submit_button(
+                        "❌ Cancelar", use_container_width=True,
+                        on_click=definir_estado, args=("editando_id", None),
+                    )
+
+    # --- Ações: editar e remover ---
+    selecionado_gasto = st.selectbox(
+        "Selecione um gasto", ["Selecione..."] + opcoes, label_visibility="collapsed",
+    )
+
+    if selecionado_gasto != "Selecione...":
+        gasto_id = int(selecionado_gasto.split(".")[0])
+        btn_edit, btn_del = st.columns(2)
+        with btn_edit:
+            st.button(
+                "✏️ Editar", use_container_width=True,
+                on_click=definir_estado, args=("editando_id", gasto_id),
             )
+        with btn_del:
+            if st.button("🗑️ Remover", use_container_width=True, type="primary"):
+                remover_gasto(gasto_id)
+                recarregar_pagina("Gasto removido!")
 
-            if selecionado_gasto != "Selecione...":
-                gasto_id = int(selecionado_gasto.split(".")[0])
-                btn_edit, btn_del = st.columns(2)
-                with btn_edit:
-                    if st.button("✏️ Editar", use_container_width=True):
-                        st.session_state.editando_id = gasto_id
-                        st.rerun()
-                with btn_del:
-                    if st.button("🗑️ Remover", use_container_width=True, type="primary"):
-                        remover_gasto(gasto_id)
-                        st.success("Gasto removido!")
-                        st.rerun()
-        else:
-            st.info("Nenhum gasto encontrado para os filtros selecionados.")
 
-with col2:
+@st.fragment
+def resumo_mes(selecionado: str, salario: float, avaliacao: dict) -> None:
     st.markdown("### 💵 Resumo")
-    fixos, variaveis, total = somar_por_tipo(selecionado)
+    fixos, variaveis, total = livro.somar_por_tipo(selecionado)
     saldo = salario - total
 
     st.metric("Salário", f"R$ {salario:,.2f}")
@@ -382,93 +516,145 @@ with col2:
             st.success("✓ Gastos controlados")
 
     # --- Meta do mês ---
-    meta_mes = obter_meta(selecionado)
-    if meta_mes and meta_mes > 0:
+    meta_mes = avaliacao.get((selecionado, None))
+    if meta_mes and meta_mes["limite"] > 0:
         st.markdown("---")
         st.markdown("### 🎯 Meta do Mês")
-        diferenca = meta_mes - total
-        if diferenca >= 0:
-            st.success(f"Dentro da meta! Resta R$ {diferenca:,.2f}")
-        else:
+        diferenca = meta_mes["restante"]
+        if meta_mes["status"] == "excedido":
             st.error(f"Meta ultrapassada em R$ {abs(diferenca):,.2f}")
-
-# -------------------------
-# Visualizações
-# -------------------------
-st.markdown("---")
-st.subheader("📈 Visualizações")
-
-tab1, tab2, tab3 = st.tabs(["Distribuição", "Categorias", "Evolução Mensal"])
-
-with tab1:
-    col_g1, col_g2 = st.columns(2)
-    with col_g1:
-        fixos, variaveis, total = somar_por_tipo(selecionado)
-        if total > 0:
-            fig = grafico_pizza_tipo(fixos, variaveis)
-            st.plotly_chart(fig, use_container_width=True)
+        elif meta_mes["status"] == "atencao":
+            st.warning(f"Atenção: {meta_mes['percentual']:.1f}% da meta utilizada. Resta R$ {diferenca:,.2f}")
         else:
-            st.info("Sem gastos para exibir o gráfico.")
+            st.success(f"Dentro da meta! Resta R$ {diferenca:,.2f}")
 
-    with col_g2:
-        gastos_mes_chart = obter_gastos_mes(selecionado)
-        if gastos_mes_chart:
-            fig = grafico_pizza_categorias(gastos_mes_chart)
-            if fig:
-                st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.info("Sem gastos para exibir o gráfico.")
-
-with tab2:
-    gastos_mes_bar = obter_gastos_mes(selecionado)
-    if gastos_mes_bar:
-        col_bar, col_gauge = st.columns(2)
-        with col_bar:
-            fig = grafico_barras_categorias(gastos_mes_bar)
-            if fig:
-                st.plotly_chart(fig, use_container_width=True)
-        with col_gauge:
-            meta_mes = obter_meta(selecionado)
-            if meta_mes and meta_mes > 0:
-                _, _, total_mes = somar_por_tipo(selecionado)
-                fig = grafico_meta_vs_gasto(total_mes, meta_mes, selecionado)
+    # --- Orçamentos por categoria ---
+    orcamentos_mes = [
+        a for (mes_av, categoria), a in avaliacao.items()
+        if mes_av == selecionado and categoria is not None
+    ]
+    if orcamentos_mes:
+        st.markdown("---")
+        st.markdown("### 📋 Orçamentos")
+        df_orcamentos = pd.DataFrame([
+            {
+                "Categoria": a["categoria"],
+                "Limite": f"R$ {a['limite']:,.2f}",
+                "Gasto": f"R$ {a['gasto']:,.2f}",
+                "%": f"{a['percentual']:.0f}%" if a["percentual"] is not None else "—",
+                "Status": ICONES_STATUS[a["status"]],
+            }
+            for a in orcamentos_mes
+        ])
+        st.dataframe(df_orcamentos, use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def visualizacoes(
+    selecionado: str,
+    salario: float,
+    meta_mes: dict,
+    alerta_atencao: float,
+    alerta_excedido: float,
+) -> None:
+    st.subheader("📈 Visualizações")
+    versao_mes = livro.versao("gastos", selecionado)
+    gastos_mes = livro.gastos_mes(selecionado)
+
+    tab1, tab2, tab3 = st.tabs(["Distribuição", "Categorias", "Evolução Mensal"])
+
+    with tab1:
+        col_g1, col_g2 = st.columns(2)
+        with col_g1:
+            fixos, variaveis, total = livro.somar_por_tipo(selecionado)
+            if total > 0:
+                fig = memorizar(
+                    "grafico_pizza_tipo", (selecionado, versao_mes),
+                    lambda: grafico_pizza_tipo(fixos, variaveis),
+                )
                 st.plotly_chart(fig, use_container_width=True)
             else:
-                st.info("Defina uma meta na barra lateral para ver o indicador.")
-    else:
-        st.info("Adicione gastos para ver os gráficos de categorias.")
+                st.info("Sem gastos para exibir o gráfico.")
 
-with tab3:
-    totais = totais_mensais()
-    if any(totais.values()):
-        fig = grafico_evolucao_mensal(MESES, list(totais.values()), salario)
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Sem gastos para exibir a evolução mensal.")
+        with col_g2:
+            if gastos_mes:
+                fig = memorizar(
+                    "grafico_pizza_categorias", (selecionado, versao_mes),
+                    lambda: grafico_pizza_categorias(gastos_mes),
+                )
+                if fig:
+                    st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("Sem gastos para exibir o gráfico.")
+
+    with tab2:
+        if gastos_mes:
+            col_bar, col_gauge = st.columns(2)
+            with col_bar:
+                fig = memorizar(
+                    "grafico_barras_categorias", (selecionado, versao_mes),
+                    lambda: grafico_barras_categorias(gastos_mes),
+                )
+                if fig:
+                    st.plotly_chart(fig, use_container_width=True)
+            with col_gauge:
+                if meta_mes and meta_mes["limite"] > 0:
+                    fig = memorizar(
+                        "grafico_meta_vs_gasto", (selecionado, meta_mes, alerta_atencao, alerta_excedido),
+                        lambda: grafico_meta_vs_gasto(
+                            meta_mes["gasto"], meta_mes["limite"], selecionado,
+                            alerta_atencao, alerta_excedido,
+                        ),
+                    )
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.info("Defina uma meta na barra lateral para ver o indicador.")
+        else:
+            st.info("Adicione gastos para ver os gráficos de categorias.")
+
+    with tab3:
+        totais = livro.totais_mensais()
+        if any(totais.values()):
+            fig = memorizar(
+                "grafico_evolucao_mensal", (livro.versao("gastos"), salario),
+                lambda: grafico_evolucao_mensal(MESES, list(totais.values()), salario),
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Sem gastos para exibir a evolução mensal.")
+
+
+@st.fragment
+def resumo_anual(salario: float, avaliacao: dict) -> None:
+    st.subheader("📊 Resumo Anual")
+    totais = livro.totais_mensais()
+    metas = livro.metas
+
+    if not any(totais.values()):
+        st.info("Adicione gastos para ver o resumo anual.")
+        return
+
+    def montar() -> pd.DataFrame:
+        dados_anuais = []
+        for m in MESES:
+            gasto = totais[m]
+            saldo_m = salario - gasto
+            meta_m = metas.get(m)
+            avaliacao_m = avaliacao.get((m, None))
+            dados_anuais.append({
+                "Mês": m,
+                "Gasto": f"R$ {gasto:,.2f}",
+                "Saldo": f"R$ {saldo_m:,.2f}",
+                "Meta": f"R$ {meta_m:,.2f}" if meta_m else "—",
+                "Status": ICONES_STATUS[avaliacao_m["status"]] if meta_m and avaliacao_m else "—",
+            })
+        return pd.DataFrame(dados_anuais)
 
-# -------------------------
-# Resumo Anual
-# -------------------------
-st.markdown("---")
-st.subheader("📊 Resumo Anual")
-totais = totais_mensais()
-metas = obter_todas_metas()
-
-if any(totais.values()):
-    dados_anuais = []
-    for m in MESES:
-        gasto = totais[m]
-        saldo_m = salario - gasto
-        meta_m = metas.get(m)
-        dados_anuais.append({
-            "Mês": m,
-            "Gasto": f"R$ {gasto:,.2f}",
-            "Saldo": f"R$ {saldo_m:,.2f}",
-            "Meta": f"R$ {meta_m:,.2f}" if meta_m else "—",
-            "Status": "✅" if (meta_m and gasto <= meta_m) else ("⚠️" if meta_m else "—"),
-        })
-
-    df_anual = pd.DataFrame(dados_anuais)
+    df_anual = memorizar(
+        "resumo_anual",
+        (livro.versao("gastos"), livro.versao("metas"), salario, avaliacao),
+        montar,
+    )
     st.dataframe(df_anual, use_container_width=True, hide_index=True)
 
     total_ano = sum(totais.values())
@@ -477,8 +663,52 @@ if any(totais.values()):
     col_ano2.metric("Receita Anual", f"R$ {salario * 12:,.2f}")
     saldo_anual = (salario * 12) - total_ano
     col_ano3.metric("Saldo Anual", f"R$ {saldo_anual:,.2f}")
-else:
-    st.info("Adicione gastos para ver o resumo anual.")
+
+
+# -------------------------
+# Layout principal
+# -------------------------
+st.title("💰 Dashboard Financeiro")
+selecionado = st.session_state.mes_selecionado
+
+# Meta geral e orçamentos por categoria de todos os meses avaliados numa
+# única consulta, refeita só quando gastos, metas, orçamentos ou alertas mudam.
+avaliacao = memorizar(
+    "avaliacao",
+    (livro.versao("gastos"), livro.versao("metas"), livro.versao("orcamentos"), alerta_atencao, alerta_excedido),
+    lambda: {(a["mes"], a["categoria"]): a for a in avaliar_orcamentos()},
+)
+
+# ---------- Sidebar ----------
+with st.sidebar:
+    barra_lateral(selecionado, salario, alerta_atencao, alerta_excedido)
+
+# ---------- Seleção de mês ----------
+grade_meses(selecionado, avaliacao)
+
+st.markdown("---")
+
+# ---------- Área principal ----------
+st.subheader(f"📊 {selecionado}")
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    tabela_gastos(selecionado)
+
+with col2:
+    resumo_mes(selecionado, salario, avaliacao)
+
+# -------------------------
+# Visualizações
+# -------------------------
+st.markdown("---")
+visualizacoes(selecionado, salario, avaliacao.get((selecionado, None)), alerta_atencao, alerta_excedido)
+
+# -------------------------
+# Resumo Anual
+# -------------------------
+st.markdown("---")
+resumo_anual(salario, avaliacao)
 
 # Rodapé
 st.markdown("---")
@@ -0,0 +1,114 @@
+"""
+Teste de carga da API de ingestão (api.py).
+
+Dispara inserções em paralelo, cada cliente com sua conexão keep-alive, e
+mede a vazão de gastos gravados e a latência das requisições.
+
+Exemplo (com um banco descartável):
+    python api.py --banco /tmp/carga.db &
+    python scripts/carga_api.py --modo unitario --clientes 32 --total 20000
+    python scripts/carga_api.py --modo lote --clientes 8 --tamanho-lote 500 --total 200000
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.constantes import MESES, CATEGORIAS, TIPOS
+
+
+def _gasto_aleatorio() -> dict:
+    return {
+        "mes": random.choice(MESES),
+        "tipo": random.choice(TIPOS),
+        "categoria": random.choice(CATEGORIAS),
+        "descricao": f"Carga {random.randint(1, 10**6)}",
+        "valor": round(random.uniform(1, 500), 2),
+    }
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def _cliente(host, porta, modo, tamanho_lote, requisicoes, latencias, erros, trava) -> None:
+    conn = http.client.HTTPConnection(host, porta, timeout=60)
+    minhas_latencias = []
+    meus_erros = 0
+    for _ in range(requisicoes):
+        if modo == "lote":
+            caminho, corpo = "/gastos/lote", {"gastos": [_gasto_aleatorio() for _ in range(tamanho_lote)]}
+        else:
+            caminho, corpo = "/gastos", _gasto_aleatorio()
+        dados = json.dumps(corpo).encode("utf-8")
+        inicio = time.perf_counter()
+        conn.request("POST", caminho, dados, {"Content-Type": "application/json"})
+        resposta = conn.getresponse()
+        resposta.read()
+        minhas_latencias.append(time.perf_counter() - inicio)
+        if resposta.status != 201:
+            meus_erros += 1
+    conn.close()
+    with trava:
+        latencias.extend(minhas_latencias)
+        erros[0] += meus_erros
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga da API de ingestão.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8502)
+    parser.add_argument("--modo", choices=["unitario", "lote"], default="unitario")
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--total", type=int, default=10000, help="Total de gastos a inserir")
+    parser.add_argument("--tamanho-lote", type=int, default=200)
+    args = parser.parse_args()
+
+    por_requisicao = args.tamanho_lote if args.modo == "lote" else 1
+    requisicoes = max(1, args.total // por_requisicao // args.clientes)
+
+    latencias: list[float] = []
+    erros = [0]
+    trava = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=_cliente,
+            args=(args.host, args.porta, args.modo, args.tamanho_lote, requisicoes, latencias, erros, trava),
+        )
+        for _ in range(args.clientes)
+    ]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    total_requisicoes = len(latencias)
+    gravados = (total_requisicoes - erros[0]) * por_requisicao
+    print(f"Modo: {args.modo} • {args.clientes} clientes • {por_requisicao} gasto(s) por requisição")
+    print(f"Requisições: {total_requisicoes} em {duracao:.2f}s ({total_requisicoes / duracao:,.0f} req/s)")
+    print(f"Gastos gravados: {gravados} ({gravados / duracao:,.0f} gastos/s)")
+    print(
+        "Latência (ms): "
+        f"p50={_percentil(latencias, 0.50) * 1000:.1f} "
+        f"p95={_percentil(latencias, 0.95) * 1000:.1f} "
+        f"p99={_percentil(latencias, 0.99) * 1000:.1f} "
+        f"média={statistics.fmean(latencias) * 1000:.1f}"
+    )
+    print(f"Erros: {erros[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Teste de carga de sessões simultâneas do dashboard (app.py).
+
+Cada sessão é um ``AppTest`` do Streamlit rodando o app.py sem navegador,
+todas sobre o mesmo banco SQLite, como acontece num único
+``streamlit run app.py`` com vários usuários. As sessões executam um roteiro
+realista (trocar de mês, adicionar, editar e remover gastos, filtrar por
+categoria e importar um extrato) e o script mede, para cada nível de
+concorrência:
+
+- latência de cada rerun (p50/p95/p99), por ação;
+- espera pela trava de escrita (BEGIN IMMEDIATE), tempo das escritas no
+  SQLite e erros "database is locked";
+- vazão de reruns por segundo.
+
+Exemplo (banco descartável com 20 mil gastos):
+    python scripts/carga_streamlit.py --banco /tmp/carga_app.db --semear 20000 \\
+        --concorrencia 1,2,4,8 --iteracoes 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from src import database
+from src.constantes import MESES, CATEGORIAS, TIPOS
+
+APP = os.path.join(RAIZ, "app.py")
+
+# Tempos medidos em todas as conexões abertas pelo processo: a espera para
+# obter a trava de escrita (BEGIN IMMEDIATE) e, separadamente, a execução
+# das escritas e dos commits depois de obtida a trava.
+_tempos_espera: list[float] = []
+_tempos_escrita: list[float] = []
+_trava_medicao = threading.Lock()
+_COMANDOS_ESCRITA = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def _registrar(tempos: list[float], inicio: float) -> None:
+    with _trava_medicao:
+        tempos.append(time.perf_counter() - inicio)
+
+
+class ConexaoMedida(sqlite3.Connection):
+    """Conexão que separa a espera pela trava de escrita do tempo das escritas.
+
+    Antes da primeira escrita de uma transação a conexão abre a transação
+    com ``BEGIN IMMEDIATE``, que só retorna quando obtém a trava de escrita
+    do banco; o tempo desse comando é a espera pela trava.
+    """
+
+    def _medir(self, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            _registrar(_tempos_escrita, inicio)
+
+    def _obter_trava(self) -> None:
+        if not self.in_transaction:
+            inicio = time.perf_counter()
+            try:
+                super().execute("BEGIN IMMEDIATE")
+            finally:
+                _registrar(_tempos_espera, inicio)
+
+    def execute(self, sql, *args):
+        if sql.lstrip().upper().startswith(_COMANDOS_ESCRITA):
+            self._obter_trava()
+            return self._medir(super().execute, sql, *args)
+        return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        self._obter_trava()
+        return self._medir(super().executemany, sql, *args)
+
+    def commit(self):
+        if self.in_transaction:
+            return self._medir(super().commit)
+        return super().commit()
+
+    def __exit__(self, *excecao):
+        # ``with conn:`` faz o commit em C, sem passar por commit() acima.
+        if self.in_transaction:
+            return self._medir(super().__exit__, *excecao)
+        return super().__exit__(*excecao)
+
+
+def _instrumentar(banco: str) -> None:
+    """Aponta o app para o banco de teste e mede as escritas deste processo."""
+    database.DB_PATH = banco
+    conectar = sqlite3.connect
+    if getattr(conectar, "medido", False):
+        return
+
+    def conectar_medido(*args, **kwargs):
+        kwargs.setdefault("factory", ConexaoMedida)
+        return conectar(*args, **kwargs)
+
+    conectar_medido.medido = True
+    sqlite3.connect = conectar_medido
+
+
+def semear(banco: str, quantidade: int) -> None:
+    """Popula o banco de teste com gastos aleatórios."""
+    database.DB_PATH = banco
+    gastos = [
+        {
+            "mes": random.choice(MESES),
+            "tipo": random.choice(TIPOS),
+            "categoria": random.choice(CATEGORIAS),
+            "descricao": f"Semente {i}",
+            "valor": round(random.uniform(1, 500), 2),
+        }
+        for i in range(quantidade)
+    ]
+    for inicio in range(0, len(gastos), 10000):
+        database.adicionar_gastos_em_lote(gastos[inicio:inicio + 10000])
+
+
+def _extrato_csv(sessao: int, iteracao: int) -> bytes:
+    linhas = ["data,descricao,valor"]
+    for i in range(20):
+        dia = random.randint(1, 28)
+        linhas.append(f"{dia:02d}/{random.randint(1, 12):02d}/2026,Carga s{sessao} i{iteracao} n{i},-{random.uniform(5, 200):.2f}")
+    return "\n".join(linhas).encode("utf-8")
+
+
+# -------------------------
+# Roteiro de uma sessão
+# -------------------------
+
+def _por_rotulo(elementos, rotulo: str):
+    return next((e for e in elementos if e.label == rotulo), None)
+
+
+def _filtro_categorias(at):
+    return next((m for m in at.main.multiselect if m.placeholder == "Filtrar por categoria..."), None)
+
+
+def _seletor_gastos(at):
+    return next((s for s in at.main.selectbox if s.options and s.options[0] == "Selecione..."), None)
+
+
+def _executar_sessao(banco: str, sessao: int, iteracoes: int) -> dict:
+    """Roda o roteiro de uma sessão e retorna as latências por ação.
+
+    Outras sessões alteram os mesmos gastos ao mesmo tempo; quando o gasto
+    escolhido some ou muda entre dois reruns, o botão esperado não aparece e
+    a ação é contada como conflito em vez de erro.
+    """
+    _instrumentar(banco)
+    from src.importador import importar_extrato
+    from streamlit.testing.v1 import AppTest
+
+    latencias = defaultdict(list)
+    erros = []
+    conflitos = 0
+    at = AppTest.from_file(APP, default_timeout=120)
+
+    def medir(acao: str, elemento) -> None:
+        inicio = time.perf_counter()
+        elemento.run()
+        latencias[acao].append(time.perf_counter() - inicio)
+        for excecao in at.exception:
+            erros.append(excecao.message)
+
+    def clicar(acao: str, rotulo: str) -> bool:
+        nonlocal conflitos
+        botao = _por_rotulo(at.main.button, rotulo)
+        if botao is None:
+            conflitos += 1
+            return False
+        medir(acao, botao.click())
+        return True
+
+    medir("inicial", at)
+    for iteracao in range(iteracoes):
+        mes = random.choice(MESES)
+        medir("trocar_mes", at.button(key=f"btn_{mes}").click())
+
+        _por_rotulo(at.main.text_input, "Descrição").input(f"Sessão {sessao} #{iteracao}")
+        _por_rotulo(at.main.number_input, "Valor (R$)").set_value(round(random.uniform(1, 300), 2))
+        clicar("adicionar", "✅ Adicionar")
+
+        filtro = _filtro_categorias(at)
+        if filtro and filtro.options:
+            todas = list(filtro.options)
+            medir("filtrar", filtro.set_value(todas[:1]))
+            # Cada run gera uma árvore nova: o widget precisa ser buscado de novo.
+            filtro = _filtro_categorias(at)
+            if filtro:
+                medir("filtrar", filtro.set_value(todas))
+
+        seletor = _seletor_gastos(at)
+        if seletor and len(seletor.options) > 1:
+            medir("selecionar", seletor.select(random.choice(seletor.options[1:])))
+            if clicar("abrir_edicao", "✏️ Editar"):
+                valores = [n for n in at.main.number_input if n.label == "Valor (R$)"]
+                if len(valores) > 1:
+                    valores[-1].set_value(round(random.uniform(1, 300), 2))
+                    clicar("salvar_edicao", "💾 Salvar")
+
+        seletor = _seletor_gastos(at)
+        if seletor and len(seletor.options) > 1:
+            medir("selecionar", seletor.select(seletor.options[-1]))
+            clicar("remover", "🗑️ Remover")
+
+        # O AppTest não simula upload de arquivos: a importação roda pela
+        # mesma função que o botão do sidebar chama, seguida de um rerun.
+        inicio = time.perf_counter()
+        try:
+            importar_extrato(_extrato_csv(sessao, iteracao), "extrato.csv")
+        except sqlite3.OperationalError as e:
+            # O botão do sidebar mostraria o erro; aqui ele é contado.
+            erros.append(str(e))
+        at.run()
+        latencias["importar"].append(time.perf_counter() - inicio)
+
+    with _trava_medicao:
+        escritas = list(_tempos_escrita)
+        esperas = list(_tempos_espera)
+    return {
+        "latencias": dict(latencias), "erros": erros, "conflitos": conflitos,
+        "escritas": escritas, "esperas": esperas,
+    }
+
+
+def _sessao_em_processo(args) -> dict:
+    # Um processo do pool pode atender mais de uma sessão.
+    with _trava_medicao:
+        _tempos_escrita.clear()
+        _tempos_espera.clear()
+    return _executar_sessao(*args)
+
+
+# -------------------------
+# Relatório
+# -------------------------
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def _ms(valores: list[float]) -> str:
+    return (
+        f"p50={_percentil(valores, 0.50) * 1000:7.1f}  "
+        f"p95={_percentil(valores, 0.95) * 1000:7.1f}  "
+        f"p99={_percentil(valores, 0.99) * 1000:7.1f}"
+    )
+
+
+def rodar_nivel(banco: str, concorrencia: int, iteracoes: int, modo: str) -> dict:
+    """Roda ``concorrencia`` sessões em paralelo e agrega as métricas."""
+    tarefas = [(banco, s, iteracoes) for s in range(concorrencia)]
+    inicio = time.perf_counter()
+    if modo == "processos":
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(concorrencia, mp_context=contexto) as executor:
+            resultados = list(executor.map(_sessao_em_processo, tarefas))
+    else:
+        _instrumentar(banco)
+        with _trava_medicao:
+            _tempos_escrita.clear()
+            _tempos_espera.clear()
+        with ThreadPoolExecutor(concorrencia) as executor:
+            resultados = list(executor.map(lambda t: _executar_sessao(*t), tarefas))
+        # Em threads a medição é compartilhada pelo processo: conta só uma vez.
+        for r in resultados:
+            r["escritas"] = []
+            r["esperas"] = []
+        resultados[0]["escritas"] = list(_tempos_escrita)
+        resultados[0]["esperas"] = list(_tempos_espera)
+    duracao = time.perf_counter() - inicio
+
+    por_acao = defaultdict(list)
+    for r in resultados:
+        for acao, valores in r["latencias"].items():
+            por_acao[acao].extend(valores)
+    todas = [v for valores in por_acao.values() for v in valores]
+    escritas = [v for r in resultados for v in r["escritas"]]
+    esperas = [v for r in resultados for v in r["esperas"]]
+    erros = [e for r in resultados for e in r["erros"]]
+    return {
+        "concorrencia": concorrencia,
+        "duracao": duracao,
+        "por_acao": por_acao,
+        "todas": todas,
+        "escritas": escritas,
+        "esperas": esperas,
+        "travas": sum("locked" in e for e in erros),
+        "erros": len(erros),
+        "conflitos": sum(r["conflitos"] for r in resultados),
+    }
+
+
+def imprimir(nivel: dict) -> None:
+    print(f"\n=== {nivel['concorrencia']} sessão(ões) simultânea(s) ===")
+    for acao, valores in sorted(nivel["por_acao"].items()):
+        print(f"  {acao:<14} n={len(valores):<5} {_ms(valores)}")
+    print(f"  {'TODOS':<14} n={len(nivel['todas']):<5} {_ms(nivel['todas'])}")
+    esperas = nivel["esperas"]
+    if esperas:
+        print(
+            f"  espera pela trava: n={len(esperas)}  {_ms(esperas)}  "
+            f"máx={max(esperas) * 1000:.1f}ms  total={sum(esperas):.2f}s"
+        )
+    escritas = nivel["escritas"]
+    if escritas:
+        print(
+            f"  escritas SQLite: n={len(escritas)}  {_ms(escritas)}  "
+            f"máx={max(escritas) * 1000:.1f}ms  total={sum(escritas):.2f}s"
+        )
+    print(
+        f"  vazão: {len(nivel['todas']) / nivel['duracao']:.1f} reruns/s  •  "
+        f"'database is locked': {nivel['travas']}  •  outros erros: {nivel['erros'] - nivel['travas']}  •  "
+        f"conflitos: {nivel['conflitos']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Teste de carga de sessões simultâneas do dashboard.")
+    parser.add_argument("--banco", default="/tmp/carga_app.db", help="Banco SQLite de teste (será usado pelo app)")
+    parser.add_argument("--semear", type=int, default=0, help="Gastos aleatórios a inserir antes do teste")
+    parser.add_argument("--concorrencia", default="1,2,4,8", help="Níveis de concorrência separados por vírgula")
+    parser.add_argument("--iteracoes", type=int, default=3, help="Repetições do roteiro por sessão")
+    parser.add_argument("--modo", choices=["processos", "threads"], default="processos")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.banco) == os.path.abspath(database.DB_PATH):
+        parser.error("use um banco de teste, não o financeiro.db")
+    if args.semear:
+        semear(args.banco, args.semear)
+
+    niveis = []
+    for concorrencia in (int(n) for n in args.concorrencia.split(",")):
+        nivel = rodar_nivel(args.banco, concorrencia, args.iteracoes, args.modo)
+        imprimir(nivel)
+        niveis.append(nivel)
+
+    print("\n=== Resumo ===")
+    print(
+        f"{'sessões':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'reruns/s':>9} "
+        f"{'trava p95 ms':>13} {'escrita p95 ms':>15} {'locked':>7}"
+    )
+    for n in niveis:
+        print(
+            f"{n['concorrencia']:>8} "
+            f"{_percentil(n['todas'], 0.50) * 1000:>8.1f} "
+            f"{_percentil(n['todas'], 0.95) * 1000:>8.1f} "
+            f"{_percentil(n['todas'], 0.99) * 1000:>8.1f} "
+            f"{len(n['todas']) / n['duracao']:>9.1f} "
+            f"{_percentil(n['esperas'], 0.95) * 1000:>13.1f} "
+            f"{_percentil(n['escritas'], 0.95) * 1000:>15.1f} "
+            f"{n['travas']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Latência de rerun do dashboard (app.py) com um livro-caixa grande.
+
+Roda o app.py num ``AppTest`` sobre um banco de teste e, para cada
+interação, mede:
+
+- o rerun da página inteira (o que toda interação custava antes dos
+  fragmentos e o que ainda custam as ações que alteram dados);
+- o tempo de cada fragmento (``st.fragment``) dentro desse rerun. Quando a
+  interação acontece num widget de um fragmento, o navegador reroda só esse
+  fragmento, então esse é o tempo que o usuário espera.
+
+O ``AppTest`` sempre reroda o script inteiro; por isso o tempo dos
+fragmentos é medido envolvendo ``st.fragment`` antes de carregar o app.
+
+Exemplo (banco descartável com 50 mil gastos):
+    python scripts/medir_reruns.py --banco /tmp/reruns.db --semear 50000 --repeticoes 5
+"""
+
+import argparse
+import functools
+import os
+import sys
+import time
+
+import streamlit as st
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from carga_streamlit import APP, semear, _filtro_categorias, _por_rotulo, _seletor_gastos
+from src import database
+from src.constantes import MESES
+
+# Tempo de cada fragmento no último rerun, pelo nome da função.
+_tempos_fragmentos: dict[str, float] = {}
+_fragmento_original = st.fragment
+
+
+def _fragmento_medido(func=None, **kwargs):
+    """Substituto de ``st.fragment`` que mede o tempo de cada execução."""
+    if func is None:
+        return lambda f: _fragmento_medido(f, **kwargs)
+
+    @functools.wraps(func)
+    def medido(*args, **kw):
+        inicio = time.perf_counter()
+        try:
+            return func(*args, **kw)
+        finally:
+            _tempos_fragmentos[func.__name__] = time.perf_counter() - inicio
+
+    return _fragmento_original(medido, **kwargs)
+
+
+def _rodar(at, elemento=None) -> tuple[float, dict]:
+    """Executa um rerun e retorna a duração total e a de cada fragmento."""
+    _tempos_fragmentos.clear()
+    inicio = time.perf_counter()
+    (elemento or at).run()
+    duracao = time.perf_counter() - inicio
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return duracao, dict(_tempos_fragmentos)
+
+
+def medir(app: str, repeticoes: int) -> dict:
+    """Roda as interações e retorna ``{acao: (fragmento, [totais], [tempos do fragmento])}``."""
+    from streamlit.testing.v1 import AppTest
+
+    st.fragment = _fragmento_medido
+    resultados = {}
+
+    def registrar(acao: str, fragmento, execucoes: list[tuple[float, dict]]) -> None:
+        resultados[acao] = (
+            fragmento,
+            [total for total, _ in execucoes],
+            [tempos[fragmento] for _, tempos in execucoes if fragmento in tempos],
+        )
+
+    at = AppTest.from_file(app, default_timeout=300)
+    registrar("carga inicial", None, [_rodar(at)])
+    registrar("rerun sem alteração", None, [_rodar(at) for _ in range(repeticoes)])
+
+    execucoes = []
+    for i in range(repeticoes):
+        filtro = _filtro_categorias(at)
+        valor = filtro.options[: len(filtro.options) // 2] if i % 2 == 0 else filtro.options
+        execucoes.append(_rodar(at, filtro.set_value(valor)))
+    registrar("filtrar categorias", "tabela_gastos", execucoes)
+
+    execucoes = []
+    for i in range(repeticoes):
+        seletor = _seletor_gastos(at)
+        execucoes.append(_rodar(at, seletor.set_value(seletor.options[1 + i % (len(seletor.options) - 1)])))
+    registrar("selecionar gasto", "tabela_gastos", execucoes)
+
+    execucoes = []
+    for _ in range(repeticoes):
+        execucoes.append(_rodar(at, _por_rotulo(at.main.button, "✏️ Editar").click()))
+        _rodar(at, _por_rotulo(at.main.button, "❌ Cancelar").click())
+    registrar("abrir edição", "tabela_gastos", execucoes)
+
+    execucoes = []
+    salario = _por_rotulo(at.sidebar.number_input, "Salário mensal (R$)")
+    base = salario.value
+    for i in range(repeticoes):
+        salario = _por_rotulo(at.sidebar.number_input, "Salário mensal (R$)")
+        execucoes.append(_rodar(at, salario.set_value(base + 100.0 * (i + 1))))
+    _rodar(at, _por_rotulo(at.sidebar.number_input, "Salário mensal (R$)").set_value(base))
+    registrar("editar salário", None, execucoes)
+
+    execucoes = []
+    for i in range(repeticoes):
+        mes = MESES[(i + 1) % len(MESES)]
+        execucoes.append(_rodar(at, at.button(key=f"btn_{mes}").click()))
+    registrar("trocar mês", None, execucoes)
+
+    st.fragment = _fragmento_original
+    return resultados
+
+
+def _media_ms(valores: list[float]) -> str:
+    return f"{sum(valores) / len(valores) * 1000:9.1f}" if valores else f"{'—':>9}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latência de rerun do dashboard com um livro grande.")
+    parser.add_argument("--banco", default="/tmp/reruns_app.db", help="Banco SQLite de teste (será usado pelo app)")
+    parser.add_argument("--semear", type=int, default=0, help="Gastos aleatórios a inserir antes da medição")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições de cada interação")
+    parser.add_argument("--app", default=APP, help="Script do dashboard (ex.: uma versão anterior para comparar)")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.banco) == os.path.abspath(database.DB_PATH):
+        parser.error("use um banco de teste, não o financeiro.db")
+    if args.semear:
+        semear(args.banco, args.semear)
+    database.DB_PATH = args.banco
+    total_gastos = len(database.obter_todos_gastos())
+
+    resultados = medir(os.path.abspath(args.app), args.repeticoes)
+
+    print(f"\n=== Latência de rerun ({total_gastos} gastos, média de {args.repeticoes} repetições) ===")
+    print(f"{'interação':<22} {'página ms':>9} {'fragmento':<15} {'fragmento ms':>12}")
+    for acao, (fragmento, totais, tempos) in resultados.items():
+        print(
+            f"{acao:<22} {_media_ms(totais)} {fragmento or 'página inteira':<15} "
+            f"{_media_ms(tempos) if fragmento else _media_ms(totais):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Módulo de snapshots do banco SQLite.
+
+Copia o ``financeiro.db`` com a API de backup online do SQLite em passos
+incrementais, sem bloquear as escritas do dashboard, mantém snapshots
+rotativos com regras de retenção e restaura um snapshot com um comando:
+
+    python -m src.backup criar
+    python -m src.backup listar
+    python -m src.backup restaurar snapshots/financeiro-20260101-120000-000000.db
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src import database
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "snapshots")
+PREFIXO = "financeiro-"
+FORMATO_DATA = "%Y%m%d-%H%M%S-%f"
+
+# Páginas copiadas por passo e pausa entre passos. A pausa é feita pelo
+# callback de progresso do backup, chamado ao fim de cada passo; o
+# ``sleep`` do próprio ``Connection.backup`` só vale quando o passo
+# encontra o banco ocupado.
+PAGINAS_POR_PASSO = 256
+PAUSA_ENTRE_PASSOS = 0.005
+
+# Retenção padrão: os N snapshots mais recentes + o último de cada dia.
+MANTER_ULTIMOS = 10
+MANTER_DIARIOS = 7
+
+_trava_snapshot = threading.Lock()
+
+# Resultado do último snapshot em segundo plano, consultado pelo dashboard.
+_ultimo_em_segundo_plano: Optional[dict] = None
+
+
+def _nome_snapshot(momento: datetime) -> str:
+    return f"{PREFIXO}{momento.strftime(FORMATO_DATA)}.db"
+
+
+def _data_snapshot(nome: str) -> Optional[datetime]:
+    """Extrai a data do nome do arquivo ou None se não for um snapshot."""
+    if not (nome.startswith(PREFIXO) and nome.endswith(".db")):
+        return None
+    try:
+        return datetime.strptime(nome[len(PREFIXO):-3], FORMATO_DATA)
+    except ValueError:
+        return None
+
+
+def criar_snapshot(
+    destino_dir: str = SNAPSHOT_DIR,
+    paginas_por_passo: int = PAGINAS_POR_PASSO,
+    pausa: float = PAUSA_ENTRE_PASSOS,
+) -> str:
+    """Copia o banco para um novo snapshot e retorna o caminho do arquivo.
+
+    A cópia é gravada num arquivo temporário e só recebe o nome final quando
+    termina, então um snapshot listado está sempre completo.
+    """
+    os.makedirs(destino_dir, exist_ok=True)
+    caminho = os.path.join(destino_dir, _nome_snapshot(datetime.now()))
+    temporario = caminho + ".parcial"
+
+    with _trava_snapshot:
+        try:
+            origem = database.get_connection()
+            destino = sqlite3.connect(temporario)
+            try:
+                # Mantém uma transação de leitura aberta durante toda a cópia: no
+                # modo WAL ela fixa a versão do banco sem bloquear os escritores,
+                # e o backup não recomeça a cada commit concorrente.
+                origem.execute("BEGIN")
+                origem.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                def _pausar(status: int, restantes: int, total: int) -> None:
+                    if restantes and pausa > 0:
+                        time.sleep(pausa)
+
+                origem.backup(destino, pages=paginas_por_passo, progress=_pausar, sleep=pausa)
+                origem.rollback()
+            finally:
+                destino.close()
+                origem.close()
+            os.replace(temporario, caminho)
+        except BaseException:
+            # Uma cópia interrompida não deve ficar esquecida na pasta.
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+    return caminho
+
+
+def criar_snapshot_em_segundo_plano(
+    destino_dir: str = SNAPSHOT_DIR,
+    manter_ultimos: int = MANTER_ULTIMOS,
+    manter_diarios: int = MANTER_DIARIOS,
+) -> threading.Thread:
+    """Cria um snapshot numa thread daemon e aplica a retenção ao final.
+
+    O andamento e o resultado (caminho ou erro) ficam disponíveis em
+    :func:`estado_snapshot_em_segundo_plano`.
+    """
+    global _ultimo_em_segundo_plano
+    estado = {"inicio": datetime.now(), "concluido": False, "caminho": None, "erro": None}
+    _ultimo_em_segundo_plano = estado
+
+    def _executar() -> None:
+        try:
+            estado["caminho"] = criar_snapshot(destino_dir)
+            aplicar_retencao(destino_dir, manter_ultimos, manter_diarios)
+        except Exception as e:
+            estado["erro"] = f"{type(e).__name__}: {e}"
+        finally:
+            estado["concluido"] = True
+
+    thread = threading.Thread(target=_executar, name="snapshot-financeiro", daemon=True)
+    thread.start()
+    return thread
+
+
+def estado_snapshot_em_segundo_plano() -> Optional[dict]:
+    """Retorna o estado do último snapshot em segundo plano ou None se não houve.
+
+    O dicionário traz ``inicio``, ``concluido``, ``caminho`` e ``erro``.
+    """
+    estado = _ultimo_em_segundo_plano
+    return dict(estado) if estado is not None else None
+
+
+def listar_snapshots(destino_dir: str = SNAPSHOT_DIR) -> list[dict]:
+    """Retorna os snapshots existentes, do mais recente para o mais antigo."""
+    if not os.path.isdir(destino_dir):
+        return []
+    snapshots = []
+    for nome in os.listdir(destino_dir):
+        data = _data_snapshot(nome)
+        if data is None:
+            continue
+        caminho = os.path.join(destino_dir, nome)
+        snapshots.append({
+            "caminho": caminho,
+            "data": data,
+            "tamanho": os.path.getsize(caminho),
+        })
+    return sorted(snapshots, key=lambda s: s["data"], reverse=True)
+
+
+def aplicar_retencao(
+    destino_dir: str = SNAPSHOT_DIR,
+    manter_ultimos: int = MANTER_ULTIMOS,
+    manter_diarios: int = MANTER_DIARIOS,
+) -> list[str]:
+    """Remove snapshots fora das regras de retenção e retorna os removidos.
+
+    São mantidos os ``manter_ultimos`` mais recentes e, para cada um dos
+    últimos ``manter_diarios`` dias, o snapshot mais recente daquele dia.
+    """
+    snapshots = listar_snapshots(destino_dir)
+    manter = {s["caminho"] for s in snapshots[:manter_ultimos]}
+
+    limite = datetime.now().date() - timedelta(days=manter_diarios - 1)
+    dias_vistos = set()
+    for s in snapshots:
+        dia = s["data"].date()
+        if dia >= limite and dia not in dias_vistos:
+            dias_vistos.add(dia)
+            manter.add(s["caminho"])
+
+    removidos = []
+    for s in snapshots:
+        if s["caminho"] not in manter:
+            os.remove(s["caminho"])
+            removidos.append(s["caminho"])
+    return removidos
+
+
+def restaurar_snapshot(caminho: str) -> None:
+    """Substitui o conteúdo do banco pelo do snapshot informado.
+
+    Usa a própria API de backup no sentido inverso, o que mantém válidas as
+    conexões abertas e o arquivo WAL do banco em uso.
+    """
+    if not os.path.isfile(caminho):
+        raise FileNotFoundError(f"Snapshot não encontrado: {caminho}")
+    ultima = database.ultima_alteracao()
+    origem = sqlite3.connect(caminho)
+    destino = database.get_connection()
+    try:
+        origem.backup(destino)
+    finally:
+        origem.close()
+        destino.close()
+    # O snapshot pode vir de uma versão anterior do esquema.
+    database.invalidar_esquema()
+
+    # O snapshot traz um log de alterações mais antigo: a sequência continua de
+    # onde estava e um registro de restauração avisa as sessões para recarregar.
+    conn = database.get_connection()
+    with conn:
+        seq = max(ultima, database.ultima_alteracao()) + 1
+        conn.execute(
+            "INSERT INTO alteracoes (seq, tabela, operacao, chave) VALUES (?, 'banco', 'RESTAURACAO', ?)",
+            (seq, os.path.basename(caminho))
+        )
+    conn.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Snapshots do banco financeiro.")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="Pasta dos snapshots")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("criar", help="Cria um snapshot e aplica a retenção")
+    sub.add_parser("listar", help="Lista os snapshots existentes")
+    restaurar = sub.add_parser("restaurar", help="Restaura um snapshot")
+    restaurar.add_argument("snapshot", nargs="?", help="Arquivo do snapshot (padrão: o mais recente)")
+    args = parser.parse_args(argv)
+
+    if args.comando == "criar":
+        inicio = time.perf_counter()
+        caminho = criar_snapshot(args.dir)
+        removidos = aplicar_retencao(args.dir)
+        print(f"Snapshot criado: {caminho} ({time.perf_counter() - inicio:.2f}s)")
+        for r in removidos:
+            print(f"Removido pela retenção: {r}")
+    elif args.comando == "listar":
+        for s in listar_snapshots(args.dir):
+            print(f"{s['data']:%Y-%m-%d %H:%M:%S}  {s['tamanho']:>10} bytes  {s['caminho']}")
+    else:
+        caminho = args.snapshot
+        if caminho is None:
+            snapshots = listar_snapshots(args.dir)
+            if not snapshots:
+                parser.error("nenhum snapshot encontrado")
+            caminho = snapshots[0]["caminho"]
+        restaurar_snapshot(caminho)
+        print(f"Banco restaurado a partir de {caminho}")
+
+
+if __name__ == "__main__":
+    main()
@@ -110,13 +110,25 @@ def grafico_barras_categorias(gastos: list[dict]) -> go.Figure:
     return fig
 
 
-def grafico_meta_vs_gasto(gasto_total: float, meta: float, mes: str) -> go.Figure:
-    """Gráfico de gauge mostrando progresso em relação à meta."""
+def grafico_meta_vs_gasto(
+    gasto_total: float,
+    meta: float,
+    mes: str,
+    alerta_atencao: float = 80.0,
+    alerta_excedido: float = 100.0,
+) -> go.Figure:
+    """Gráfico de gauge mostrando progresso em relação à meta.
+
+    As faixas de cor seguem os percentuais de alerta configurados.
+    """
     percentual = (gasto_total / meta * 100) if meta > 0 else 0
+    atencao = meta * alerta_atencao / 100
+    excedido = meta * alerta_excedido / 100
+    limite_eixo = max(meta * 1.2, excedido * 1.05, gasto_total * 1.1)
 
-    if percentual <= 80:
+    if percentual <= alerta_atencao:
         bar_color = "#00b894"
-    elif percentual <= 100:
+    elif percentual <= alerta_excedido:
         bar_color = "#fdcb6e"
     else:
         bar_color = "#ff6b6b"
@@ -128,12 +140,12 @@ def grafico_meta_vs_gasto(gasto_total: float, meta: float, mes: str) -> go.Figur
         delta={"reference": meta, "valueformat": ",.2f", "prefix": "R$ "},
         title={"text": f"Meta de {mes}"},
         gauge={
-            "axis": {"range": [0, max(meta * 1.2, gasto_total * 1.1)]},
+            "axis": {"range": [0, limite_eixo]},
             "bar": {"color": bar_color},
             "steps": [
-                {"range": [0, meta * 0.8], "color": "#e8f5e9"},
-                {"range": [meta * 0.8, meta], "color": "#fff3e0"},
-                {"range": [meta, max(meta * 1.2, gasto_total * 1.1)], "color": "#ffebee"},
+                {"range": [0, atencao], "color": "#e8f5e9"},
+                {"range": [atencao, excedido], "color": "#fff3e0"},
+                {"range": [excedido, limite_eixo], "color": "#ffebee"},
             ],
             "threshold": {
                 "line": {"color": "#2d3436", "width": 3},
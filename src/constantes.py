@@ -0,0 +1,15 @@
+"""
+Constantes compartilhadas entre o dashboard e os serviços auxiliares.
+"""
+
+MESES = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
+]
+
+CATEGORIAS = [
+    "Moradia", "Alimentação", "Transporte", "Saúde", "Educação",
+    "Lazer", "Vestuário", "Serviços", "Investimentos", "Outros",
+]
+
+TIPOS = ["Fixo", "Variável"]
@@ -1,25 +1,64 @@
 """
 Módulo de persistência com SQLite.
 
-Gerencia o armazenamento de gastos, configurações (salário) e metas mensais.
+Gerencia o armazenamento de gastos, configurações (salário), metas mensais,
+orçamentos por categoria e regras de categorização usadas na importação de
+extratos.
+
+Toda alteração em gastos, metas e configurações é registrada por gatilhos na
+tabela ``alteracoes``, com um número de sequência crescente. Ela serve de
+trilha de auditoria e permite que cada sessão do dashboard busque apenas o
+que mudou desde a última leitura (ver ``src/livro.py``).
 """
 
+import json
 import sqlite3
 import os
+import threading
 from typing import Optional
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "financeiro.db")
 
+# Tabelas auditadas: (coluna usada como chave, colunas gravadas no log).
+TABELAS_AUDITADAS = {
+    "gastos": ("id", ["id", "mes", "tipo", "categoria", "descricao", "valor"]),
+    "metas": ("mes", ["mes", "valor_meta"]),
+    "configuracoes": ("chave", ["chave", "valor"]),
+    "orcamentos": ("id", ["id", "mes", "categoria", "valor"]),
+}
+
+# Limites padrão dos alertas de orçamento, em % do valor orçado.
+ALERTA_ATENCAO_PADRAO = 80.0
+ALERTA_EXCEDIDO_PADRAO = 100.0
+
+
+# Bancos cujas tabelas, gatilhos e migrações já foram aplicados neste processo.
+_bancos_preparados: set[str] = set()
+_trava_preparo = threading.Lock()
+
 
 def get_connection() -> sqlite3.Connection:
-    """Retorna uma conexão com o banco SQLite, criando as tabelas se necessário."""
-    conn = sqlite3.connect(DB_PATH)
+    """Retorna uma conexão com o banco SQLite, criando as tabelas se necessário.
+
+    O esquema é preparado só na primeira conexão com cada ``DB_PATH``.
+    """
+    caminho = DB_PATH
+    conn = sqlite3.connect(caminho)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    _criar_tabelas(conn)
+    if caminho not in _bancos_preparados:
+        with _trava_preparo:
+            if caminho not in _bancos_preparados:
+                conn.execute("PRAGMA journal_mode=WAL")
+                _criar_tabelas(conn)
+                _bancos_preparados.add(caminho)
     return conn
 
 
+def invalidar_esquema(caminho: Optional[str] = None) -> None:
+    """Faz a próxima conexão preparar o esquema de novo (ex.: após restaurar um snapshot)."""
+    _bancos_preparados.discard(caminho or DB_PATH)
+
+
 def _criar_tabelas(conn: sqlite3.Connection) -> None:
     """Cria as tabelas do banco caso não existam."""
     conn.executescript("""
@@ -30,7 +69,8 @@ def _criar_tabelas(conn: sqlite3.Connection) -> None:
             categoria TEXT NOT NULL DEFAULT 'Outros',
             descricao TEXT NOT NULL,
             valor REAL NOT NULL,
-            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            hash_conteudo TEXT
         );
 
         CREATE TABLE IF NOT EXISTS configuracoes (
@@ -43,10 +83,115 @@ def _criar_tabelas(conn: sqlite3.Connection) -> None:
             mes TEXT NOT NULL UNIQUE,
             valor_meta REAL NOT NULL
         );
+
+        CREATE TABLE IF NOT EXISTS regras_categoria (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            padrao TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            tipo TEXT,
+            prioridade INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS alteracoes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            operacao TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            dados TEXT,
+            anterior TEXT,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS orcamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            mes TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            valor REAL NOT NULL,
+            UNIQUE (mes, categoria)
+        );
+
+        CREATE TABLE IF NOT EXISTS totais_categoria (
+            mes TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            total REAL NOT NULL,
+            quantidade INTEGER NOT NULL,
+            PRIMARY KEY (mes, categoria)
+        );
     """)
+    _migrar(conn)
+    _criar_gatilhos(conn)
     conn.commit()
 
 
+def _criar_gatilhos(conn: sqlite3.Connection) -> None:
+    """Cria os gatilhos que registram as alterações na tabela ``alteracoes``."""
+    for tabela, (chave, colunas) in TABELAS_AUDITADAS.items():
+        novo = "json_object(" + ", ".join(f"'{c}', NEW.{c}" for c in colunas) + ")"
+        antigo = "json_object(" + ", ".join(f"'{c}', OLD.{c}" for c in colunas) + ")"
+        conn.executescript(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_insert AFTER INSERT ON {tabela}
+            BEGIN
+                INSERT INTO alteracoes (tabela, operacao, chave, dados)
+                VALUES ('{tabela}', 'INSERT', NEW.{chave}, {novo});
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_update AFTER UPDATE ON {tabela}
+            BEGIN
+                INSERT INTO alteracoes (tabela, operacao, chave, dados, anterior)
+                VALUES ('{tabela}', 'UPDATE', NEW.{chave}, {novo}, {antigo});
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_delete AFTER DELETE ON {tabela}
+            BEGIN
+                INSERT INTO alteracoes (tabela, operacao, chave, anterior)
+                VALUES ('{tabela}', 'DELETE', OLD.{chave}, {antigo});
+            END;
+        """)
+
+    # Totais por mês e categoria mantidos a cada escrita em gastos, para que a
+    # avaliação dos orçamentos não dependa do número de gastos.
+    somar = """
+        INSERT INTO totais_categoria (mes, categoria, total, quantidade)
+        VALUES (NEW.mes, NEW.categoria, NEW.valor, 1)
+        ON CONFLICT (mes, categoria) DO UPDATE
+            SET total = total + excluded.total, quantidade = quantidade + 1;
+    """
+    subtrair = """
+        UPDATE totais_categoria SET total = total - OLD.valor, quantidade = quantidade - 1
+        WHERE mes = OLD.mes AND categoria = OLD.categoria;
+        DELETE FROM totais_categoria
+        WHERE mes = OLD.mes AND categoria = OLD.categoria AND quantidade <= 0;
+    """
+    conn.executescript(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_totais_insert AFTER INSERT ON gastos
+        BEGIN {somar} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_totais_update AFTER UPDATE OF mes, categoria, valor ON gastos
+        BEGIN {subtrair} {somar} END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_totais_delete AFTER DELETE ON gastos
+        BEGIN {subtrair} END;
+    """)
+
+
+def _migrar(conn: sqlite3.Connection) -> None:
+    """Atualiza bancos criados por versões anteriores."""
+    colunas = {r["name"] for r in conn.execute("PRAGMA table_info(gastos)")}
+    if "hash_conteudo" not in colunas:
+        conn.execute("ALTER TABLE gastos ADD COLUMN hash_conteudo TEXT")
+    # Gastos digitados no dashboard ficam com hash NULL, que o índice único ignora.
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_gastos_hash_conteudo ON gastos (hash_conteudo)"
+    )
+    # Bancos anteriores aos totais por categoria: calcula os totais uma vez.
+    sem_totais = conn.execute("SELECT 1 FROM totais_categoria LIMIT 1").fetchone() is None
+    if sem_totais and conn.execute("SELECT 1 FROM gastos LIMIT 1").fetchone() is not None:
+        conn.execute("""
+            INSERT OR IGNORE INTO totais_categoria (mes, categoria, total, quantidade)
+            SELECT mes, categoria, SUM(valor), COUNT(*) FROM gastos GROUP BY mes, categoria
+        """)
+
+
 # --- Gastos ---
 
 def adicionar_gasto(mes: str, tipo: str, categoria: str, descricao: str, valor: float) -> int:
@@ -62,6 +207,47 @@ def adicionar_gasto(mes: str, tipo: str, categoria: str, descricao: str, valor:
     return gasto_id
 
 
+def adicionar_gastos_em_lote(gastos: list[dict]) -> list[int]:
+    """Insere vários gastos numa única transação e retorna os IDs gerados."""
+    conn = get_connection()
+    ids = []
+    with conn:
+        for g in gastos:
+            cursor = conn.execute(
+                "INSERT INTO gastos (mes, tipo, categoria, descricao, valor) VALUES (?, ?, ?, ?, ?)",
+                (g["mes"], g["tipo"], g.get("categoria", "Outros"), g["descricao"], g["valor"])
+            )
+            ids.append(cursor.lastrowid)
+    conn.close()
+    return ids
+
+
+def importar_gastos_sem_duplicatas(gastos: list[dict], tamanho_lote: int = 5000) -> int:
+    """Insere gastos com ``hash_conteudo`` ignorando os já cadastrados.
+
+    A checagem de duplicidade é feita pelo índice único de ``hash_conteudo``
+    (``INSERT OR IGNORE``), em transações de até ``tamanho_lote`` gastos.
+    Retorna quantos gastos foram de fato inseridos.
+    """
+    conn = get_connection()
+    inseridos = 0
+    for inicio in range(0, len(gastos), tamanho_lote):
+        with conn:
+            cursor = conn.executemany(
+                """INSERT OR IGNORE INTO gastos (mes, tipo, categoria, descricao, valor, hash_conteudo)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [
+                    (g["mes"], g["tipo"], g["categoria"], g["descricao"], g["valor"], g["hash_conteudo"])
+                    for g in gastos[inicio:inicio + tamanho_lote]
+                ]
+            )
+            # rowcount conta só as linhas de gastos; total_changes incluiria
+            # as escritas dos gatilhos (alteracoes, totais_categoria).
+            inseridos += cursor.rowcount
+    conn.close()
+    return inseridos
+
+
 def remover_gasto(gasto_id: int) -> None:
     """Remove um gasto pelo ID."""
     conn = get_connection()
@@ -96,12 +282,42 @@ def obter_todos_gastos() -> list[dict]:
     """Retorna todos os gastos cadastrados."""
     conn = get_connection()
     rows = conn.execute(
-        "SELECT id, mes, tipo, categoria, descricao, valor FROM gastos ORDER BY criado_em"
+        "SELECT id, mes, tipo, categoria, descricao, valor, hash_conteudo FROM gastos ORDER BY criado_em"
     ).fetchall()
     conn.close()
     return [dict(r) for r in rows]
 
 
+def resumo_mes(mes: str) -> dict:
+    """Retorna os totais do mês por tipo e por categoria, agregados no SQLite."""
+    conn = get_connection()
+    totais = conn.execute(
+        """SELECT
+               COALESCE(SUM(CASE WHEN tipo = 'Fixo' THEN valor END), 0) AS fixos,
+               COALESCE(SUM(CASE WHEN tipo = 'Variável' THEN valor END), 0) AS variaveis,
+               COALESCE(SUM(valor), 0) AS total,
+               COUNT(*) AS quantidade
+           FROM gastos WHERE mes = ?""",
+        (mes,)
+    ).fetchone()
+    categorias = conn.execute(
+        "SELECT categoria, SUM(valor) AS total FROM gastos WHERE mes = ? GROUP BY categoria",
+        (mes,)
+    ).fetchall()
+    conn.close()
+    resumo = dict(totais)
+    resumo["categorias"] = {r["categoria"]: r["total"] for r in categorias}
+    return resumo
+
+
+def totais_por_mes() -> dict[str, float]:
+    """Retorna um dicionário {mês: total de gastos} com os meses que têm gastos."""
+    conn = get_connection()
+    rows = conn.execute("SELECT mes, SUM(valor) AS total FROM gastos GROUP BY mes").fetchall()
+    conn.close()
+    return {r["mes"]: r["total"] for r in rows}
+
+
 def limpar_gastos() -> None:
     """Remove todos os gastos do banco."""
     conn = get_connection()
@@ -111,14 +327,19 @@ def limpar_gastos() -> None:
 
 
 def importar_gastos(gastos: list[dict]) -> None:
-    """Importa uma lista de gastos (usada na restauração de backup)."""
+    """Importa uma lista de gastos (usada na restauração de backup).
+
+    O ``hash_conteudo`` de cada gasto, quando presente, é regravado para que
+    extratos já importados continuem sendo reconhecidos como duplicados.
+    """
     conn = get_connection()
     conn.execute("DELETE FROM gastos")
     for g in gastos:
         categoria = g.get("categoria", "Outros")
         conn.execute(
-            "INSERT INTO gastos (mes, tipo, categoria, descricao, valor) VALUES (?, ?, ?, ?, ?)",
-            (g["mes"], g["tipo"], categoria, g["descricao"], g["valor"])
+            """INSERT INTO gastos (mes, tipo, categoria, descricao, valor, hash_conteudo)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (g["mes"], g["tipo"], categoria, g["descricao"], g["valor"], g.get("hash_conteudo"))
         )
     conn.commit()
     conn.close()
@@ -130,7 +351,8 @@ def salvar_configuracao(chave: str, valor: str) -> None:
     """Salva ou atualiza uma configuração."""
     conn = get_connection()
     conn.execute(
-        "INSERT OR REPLACE INTO configuracoes (chave, valor) VALUES (?, ?)",
+        """INSERT INTO configuracoes (chave, valor) VALUES (?, ?)
+           ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor""",
         (chave, valor)
     )
     conn.commit()
@@ -153,7 +375,8 @@ def salvar_meta(mes: str, valor_meta: float) -> None:
     """Define ou atualiza a meta de economia para um mês."""
     conn = get_connection()
     conn.execute(
-        "INSERT OR REPLACE INTO metas (mes, valor_meta) VALUES (?, ?)",
+        """INSERT INTO metas (mes, valor_meta) VALUES (?, ?)
+           ON CONFLICT (mes) DO UPDATE SET valor_meta = excluded.valor_meta""",
         (mes, valor_meta)
     )
     conn.commit()
@@ -178,13 +401,178 @@ def obter_todas_metas() -> dict[str, float]:
     return {r["mes"]: r["valor_meta"] for r in rows}
 
 
+# --- Orçamentos ---
+
+def salvar_orcamento(mes: str, categoria: str, valor: float) -> None:
+    """Define ou atualiza o orçamento de uma categoria no mês."""
+    conn = get_connection()
+    conn.execute(
+        """INSERT INTO orcamentos (mes, categoria, valor) VALUES (?, ?, ?)
+           ON CONFLICT (mes, categoria) DO UPDATE SET valor = excluded.valor""",
+        (mes, categoria, valor)
+    )
+    conn.commit()
+    conn.close()
+
+
+def remover_orcamento(mes: str, categoria: str) -> None:
+    """Remove o orçamento de uma categoria no mês."""
+    conn = get_connection()
+    conn.execute("DELETE FROM orcamentos WHERE mes = ? AND categoria = ?", (mes, categoria))
+    conn.commit()
+    conn.close()
+
+
+def avaliar_orcamentos(mes: Optional[str] = None) -> list[dict]:
+    """Avalia numa única consulta a meta geral e os orçamentos por categoria.
+
+    A meta mensal aparece com ``categoria`` igual a ``None``. O gasto vem de
+    ``totais_categoria``, então o custo depende só do número de orçamentos.
+    O ``status`` é ``"ok"``, ``"atencao"`` ou ``"excedido"`` conforme os
+    percentuais configurados em ``alerta_atencao`` e ``alerta_excedido``.
+    """
+    conn = get_connection()
+    rows = conn.execute(
+        """
+        WITH limites AS (
+            SELECT mes, NULL AS categoria, valor_meta AS limite FROM metas
+            UNION ALL
+            SELECT mes, categoria, valor FROM orcamentos
+        ),
+        alertas AS (
+            SELECT
+                COALESCE((SELECT CAST(valor AS REAL) FROM configuracoes WHERE chave = 'alerta_atencao'), ?) AS atencao,
+                COALESCE((SELECT CAST(valor AS REAL) FROM configuracoes WHERE chave = 'alerta_excedido'), ?) AS excedido
+        ),
+        avaliacao AS (
+            SELECT l.mes, l.categoria, l.limite,
+                   ROUND(COALESCE(SUM(t.total), 0), 2) AS gasto
+            FROM limites l
+            LEFT JOIN totais_categoria t
+                ON t.mes = l.mes AND (l.categoria IS NULL OR t.categoria = l.categoria)
+            WHERE ? IS NULL OR l.mes = ?
+            GROUP BY l.mes, l.categoria, l.limite
+        )
+        SELECT a.mes, a.categoria, a.limite, a.gasto,
+               ROUND(a.limite - a.gasto, 2) AS restante,
+               ROUND(a.gasto * 100.0 / NULLIF(a.limite, 0), 1) AS percentual,
+               CASE
+                   WHEN a.gasto * 100.0 > a.limite * al.excedido THEN 'excedido'
+                   WHEN a.gasto * 100.0 > a.limite * al.atencao THEN 'atencao'
+                   ELSE 'ok'
+               END AS status
+        FROM avaliacao a, alertas al
+        ORDER BY a.mes, a.categoria IS NOT NULL, a.categoria
+        """,
+        (ALERTA_ATENCAO_PADRAO, ALERTA_EXCEDIDO_PADRAO, mes, mes)
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+# --- Alterações ---
+
+def ultima_alteracao() -> int:
+    """Retorna o número de sequência da alteração mais recente (0 se não houver)."""
+    conn = get_connection()
+    row = conn.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM alteracoes").fetchone()
+    conn.close()
+    return row["seq"]
+
+
+def obter_alteracoes(desde: int = 0, limite: Optional[int] = None, tabela: Optional[str] = None) -> list[dict]:
+    """Retorna as alterações com sequência maior que ``desde``, em ordem.
+
+    ``dados`` traz a linha após a alteração e ``anterior`` a linha antes dela
+    (ambos ``None`` quando não se aplicam, ex.: ``anterior`` num INSERT).
+    """
+    sql = "SELECT seq, tabela, operacao, chave, dados, anterior, criado_em FROM alteracoes WHERE seq > ?"
+    parametros: list = [desde]
+    if tabela is not None:
+        sql += " AND tabela = ?"
+        parametros.append(tabela)
+    sql += " ORDER BY seq"
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+
+    conn = get_connection()
+    rows = conn.execute(sql, parametros).fetchall()
+    conn.close()
+    alteracoes = []
+    for r in rows:
+        alteracao = dict(r)
+        alteracao["dados"] = json.loads(r["dados"]) if r["dados"] else None
+        alteracao["anterior"] = json.loads(r["anterior"]) if r["anterior"] else None
+        alteracoes.append(alteracao)
+    return alteracoes
+
+
+def obter_estado_completo() -> dict:
+    """Lê gastos, metas e configurações numa só transação, com a sequência correspondente.
+
+    Serve de ponto de partida para quem depois acompanha ``obter_alteracoes``:
+    nenhuma alteração com sequência maior que ``seq`` está refletida no estado.
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute("BEGIN")
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) AS seq FROM alteracoes").fetchone()["seq"]
+        gastos = conn.execute(
+            "SELECT id, mes, tipo, categoria, descricao, valor FROM gastos ORDER BY criado_em, id"
+        ).fetchall()
+        metas = conn.execute("SELECT mes, valor_meta FROM metas").fetchall()
+        configuracoes = conn.execute("SELECT chave, valor FROM configuracoes").fetchall()
+    conn.close()
+    return {
+        "seq": seq,
+        "gastos": [dict(r) for r in gastos],
+        "metas": {r["mes"]: r["valor_meta"] for r in metas},
+        "configuracoes": {r["chave"]: r["valor"] for r in configuracoes},
+    }
+
+
+# --- Regras de categoria ---
+
+def salvar_regra_categoria(padrao: str, categoria: str, tipo: Optional[str] = None, prioridade: int = 0) -> int:
+    """Cadastra uma regra que atribui categoria (e opcionalmente tipo) a descrições que contêm o padrão."""
+    conn = get_connection()
+    cursor = conn.execute(
+        "INSERT INTO regras_categoria (padrao, categoria, tipo, prioridade) VALUES (?, ?, ?, ?)",
+        (padrao, categoria, tipo, prioridade)
+    )
+    conn.commit()
+    regra_id = cursor.lastrowid
+    conn.close()
+    return regra_id
+
+
+def remover_regra_categoria(regra_id: int) -> None:
+    """Remove uma regra de categoria pelo ID."""
+    conn = get_connection()
+    conn.execute("DELETE FROM regras_categoria WHERE id = ?", (regra_id,))
+    conn.commit()
+    conn.close()
+
+
+def obter_regras_categoria() -> list[dict]:
+    """Retorna as regras de categoria, da maior para a menor prioridade."""
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT id, padrao, categoria, tipo, prioridade FROM regras_categoria ORDER BY prioridade DESC, id"
+    ).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
 def limpar_tudo() -> None:
-    """Remove todos os dados (gastos, configurações e metas)."""
+    """Remove todos os dados (gastos, configurações, metas e orçamentos)."""
     conn = get_connection()
     conn.executescript("""
         DELETE FROM gastos;
         DELETE FROM configuracoes;
         DELETE FROM metas;
+        DELETE FROM orcamentos;
     """)
     conn.commit()
     conn.close()
@@ -0,0 +1,196 @@
+"""
+Importação de extratos bancários (CSV e OFX) sem duplicatas.
+
+Cada transação recebe um hash do seu conteúdo, gravado na coluna indexada
+``hash_conteudo``; reimportar um extrato que se sobrepõe a outro só insere
+as transações novas. As regras de categoria cadastradas no banco são
+aplicadas a todo o extrato de uma vez, com operações vetorizadas do pandas.
+"""
+
+import hashlib
+import io
+import re
+from typing import Optional
+
+import pandas as pd
+
+from src.constantes import MESES, CATEGORIAS
+from src.database import importar_gastos_sem_duplicatas, obter_regras_categoria
+
+# Layouts de CSV conhecidos. ``sinal`` indica o sinal das despesas no arquivo:
+# -1 para extratos de conta (saídas negativas), 1 para faturas de cartão.
+LAYOUTS_CSV = [
+    {
+        "nome": "Nubank (cartão)", "data": "date", "descricao": "title", "valor": "amount",
+        "sinal": 1, "dia_primeiro": False,
+    },
+    {
+        "nome": "Nubank (conta)", "data": "data", "descricao": "descrição", "valor": "valor",
+        "id": "identificador", "sinal": -1, "dia_primeiro": True,
+    },
+]
+
+# Nomes de coluna aceitos no layout genérico.
+ALIASES_DATA = ["data", "date", "data lançamento", "data lancamento", "data da transação"]
+ALIASES_DESCRICAO = [
+    "descrição", "descricao", "histórico", "historico", "lançamento", "lancamento",
+    "title", "memo", "estabelecimento",
+]
+ALIASES_VALOR = ["valor", "amount", "valor (r$)", "quantia"]
+ALIASES_ID = ["identificador", "id", "fitid", "documento", "nº documento"]
+
+
+def _achar_coluna(colunas: list[str], aliases: list[str]) -> Optional[str]:
+    for alias in aliases:
+        if alias in colunas:
+            return alias
+    return None
+
+
+def _converter_valores(serie: pd.Series) -> pd.Series:
+    """Converte valores como ``"R$ -1.234,56"`` ou ``"-1234.56"`` para float."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float)
+    texto = serie.astype(str).str.replace(r"[R$\s]", "", regex=True)
+    formato_br = texto.str.contains(",", regex=False)
+    texto = texto.where(
+        ~formato_br,
+        texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+    )
+    return pd.to_numeric(texto, errors="coerce")
+
+
+def ler_csv(conteudo: bytes) -> pd.DataFrame:
+    """Lê um extrato CSV e retorna as colunas ``data``, ``descricao``, ``valor`` e ``id_banco``."""
+    df = pd.read_csv(io.BytesIO(conteudo), sep=None, engine="python", encoding="utf-8-sig")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    colunas = list(df.columns)
+
+    layout = next(
+        (l for l in LAYOUTS_CSV if all(l[k] in colunas for k in ("data", "descricao", "valor"))),
+        None,
+    )
+    if layout is None:
+        layout = {
+            "data": _achar_coluna(colunas, ALIASES_DATA),
+            "descricao": _achar_coluna(colunas, ALIASES_DESCRICAO),
+            "valor": _achar_coluna(colunas, ALIASES_VALOR),
+            "id": _achar_coluna(colunas, ALIASES_ID),
+            "sinal": -1,
+            "dia_primeiro": True,
+        }
+        if not (layout["data"] and layout["descricao"] and layout["valor"]):
+            raise ValueError("Layout de CSV não reconhecido: são necessárias colunas de data, descrição e valor.")
+
+    extrato = pd.DataFrame({
+        "data": pd.to_datetime(df[layout["data"]], dayfirst=layout["dia_primeiro"], errors="coerce"),
+        "descricao": df[layout["descricao"]].astype(str).str.strip(),
+        "valor": _converter_valores(df[layout["valor"]]) * layout["sinal"],
+        # Mantém NaN nas linhas sem identificador (astype(str) o tornaria "nan").
+        "id_banco": (
+            df[layout["id"]].astype(str).where(df[layout["id"]].notna())
+            if layout.get("id") in colunas else None
+        ),
+    })
+    return extrato.dropna(subset=["data", "valor"])
+
+
+def ler_ofx(conteudo: bytes) -> pd.DataFrame:
+    """Lê um extrato OFX (SGML ou XML) e retorna o mesmo formato de :func:`ler_csv`."""
+    texto = conteudo.decode("latin-1")
+    transacoes = []
+    for parte in re.split(r"<STMTTRN>", texto, flags=re.I)[1:]:
+        # No OFX em SGML as tags de campo não são fechadas; o bloco termina no
+        # fechamento da transação ou da lista.
+        bloco = re.split(r"</STMTTRN>|</BANKTRANLIST>", parte, flags=re.I)[0]
+        campos = {k.upper(): v.strip() for k, v in re.findall(r"<(\w+)>([^<\r\n]*)", bloco)}
+        transacoes.append({
+            "data": campos.get("DTPOSTED", "")[:8],
+            "descricao": campos.get("MEMO") or campos.get("NAME", ""),
+            "valor": campos.get("TRNAMT"),
+            "id_banco": campos.get("FITID"),
+        })
+    if not transacoes:
+        raise ValueError("Nenhuma transação encontrada no arquivo OFX.")
+
+    extrato = pd.DataFrame(transacoes)
+    extrato["data"] = pd.to_datetime(extrato["data"], format="%Y%m%d", errors="coerce")
+    extrato["descricao"] = extrato["descricao"].str.strip()
+    # No OFX débitos são negativos: despesas passam a ser valores positivos.
+    extrato["valor"] = -pd.to_numeric(extrato["valor"].str.replace(",", ".", regex=False), errors="coerce")
+    return extrato.dropna(subset=["data", "valor"])
+
+
+def calcular_hashes(extrato: pd.DataFrame) -> pd.Series:
+    """Calcula o hash de conteúdo de cada transação.
+
+    Quando o banco fornece um identificador (FITID, "Identificador"), ele é
+    usado; senão o hash combina data, descrição normalizada, valor e a ordem
+    da transação entre as idênticas do mesmo arquivo, para que duas compras
+    iguais no mesmo dia não se anulem.
+    """
+    descricao = extrato["descricao"].str.lower().str.replace(r"\s+", " ", regex=True)
+    chave = (
+        extrato["data"].dt.strftime("%Y-%m-%d") + "|" + descricao + "|"
+        + extrato["valor"].map("{:.2f}".format)
+    )
+    ocorrencia = chave.groupby(chave).cumcount().astype(str)
+    chave = chave + "|" + ocorrencia
+
+    if extrato["id_banco"].notna().any():
+        id_banco = extrato["id_banco"].fillna("").astype(str).str.strip()
+        sem_id = id_banco.str.lower().isin(["", "nan", "none"])
+        chave = chave.where(sem_id, "id|" + id_banco + "|" + extrato["valor"].map("{:.2f}".format))
+
+    return chave.map(lambda c: hashlib.sha256(c.encode("utf-8")).hexdigest())
+
+
+def aplicar_regras(extrato: pd.DataFrame, regras: list[dict]) -> pd.DataFrame:
+    """Atribui categoria e tipo às transações conforme as regras cadastradas.
+
+    As regras vêm ordenadas por prioridade; a primeira cujo padrão aparece na
+    descrição (sem diferenciar maiúsculas) define a categoria da transação.
+    """
+    categoria = pd.Series(pd.NA, index=extrato.index, dtype="object")
+    tipo = pd.Series(pd.NA, index=extrato.index, dtype="object")
+    descricao = extrato["descricao"].str.lower()
+    for regra in regras:
+        mascara = categoria.isna() & descricao.str.contains(regra["padrao"].lower(), regex=False)
+        categoria[mascara] = regra["categoria"]
+        if regra["tipo"]:
+            tipo[mascara] = regra["tipo"]
+
+    resultado = extrato.copy()
+    resultado["categoria"] = categoria.where(categoria.isin(CATEGORIAS), "Outros")
+    resultado["tipo"] = tipo.fillna("Variável")
+    return resultado
+
+
+def importar_extrato(conteudo: bytes, nome_arquivo: str) -> dict:
+    """Importa as despesas de um extrato CSV/OFX e retorna as contagens.
+
+    Créditos (entradas) são ignorados. Transações já importadas antes são
+    descartadas pelo banco via índice único de ``hash_conteudo``. Um extrato
+    sem nenhuma transação legível gera ``ValueError``.
+    """
+    if nome_arquivo.lower().endswith(".ofx"):
+        extrato = ler_ofx(conteudo)
+    else:
+        extrato = ler_csv(conteudo)
+    if extrato.empty:
+        raise ValueError("Nenhuma transação com data e valor válidos encontrada no extrato.")
+
+    extrato["hash_conteudo"] = calcular_hashes(extrato)
+    despesas = extrato[extrato["valor"] > 0]
+    despesas = aplicar_regras(despesas, obter_regras_categoria())
+    despesas["mes"] = despesas["data"].dt.month.map(lambda m: MESES[m - 1])
+    despesas["valor"] = despesas["valor"].round(2)
+
+    gastos = despesas[["mes", "tipo", "categoria", "descricao", "valor", "hash_conteudo"]].to_dict("records")
+    inseridos = importar_gastos_sem_duplicatas(gastos)
+    return {
+        "lidos": len(extrato),
+        "despesas": len(gastos),
+        "inseridos": inseridos,
+        "duplicados": len(gastos) - inseridos,
+    }
@@ -0,0 +1,139 @@
+"""
+Livro-caixa em memória, sincronizado pelo log de alterações do banco.
+
+Cada sessão do dashboard mantém um ``Livro`` com os gastos, metas,
+configurações e os totais por mês. Em vez de reler tudo a cada rerun, o
+livro busca só as alterações com sequência maior que a última aplicada
+(a "marca d'água") e atualiza os totais incrementalmente. Assim a sessão
+também enxerga o que outras sessões ou a API gravaram.
+
+O livro também guarda a sequência da última alteração de cada tabela e dos
+gastos de cada mês (:meth:`Livro.versao`), que o dashboard usa como
+dependência explícita para só recalcular as seções cujos dados mudaram.
+"""
+
+from typing import Optional
+
+from src.constantes import MESES
+from src.database import obter_alteracoes, obter_estado_completo
+
+
+class Livro:
+    """Estado de uma sessão: gastos, metas, configurações e totais agregados."""
+
+    def __init__(self):
+        self.marca = 0
+        self.gastos: dict[int, dict] = {}
+        self.metas: dict[str, float] = {}
+        self.configuracoes: dict[str, str] = {}
+        self._por_mes: dict[str, dict[int, dict]] = {}
+        self._totais: dict[str, dict[str, float]] = {}
+        self._base = 0
+        self._versoes: dict[str, int] = {}
+        self._versoes_mes: dict[str, int] = {}
+        self.carregar()
+
+    # --- Sincronização ---
+
+    def carregar(self) -> None:
+        """Recarrega todo o estado do banco (usado na criação e após restaurações)."""
+        estado = obter_estado_completo()
+        self.marca = estado["seq"]
+        self.gastos = {g["id"]: g for g in estado["gastos"]}
+        self.metas = estado["metas"]
+        self.configuracoes = estado["configuracoes"]
+        self._por_mes = {}
+        self._totais = {}
+        # Após uma carga completa tudo conta como alterado na marca atual.
+        self._base = self.marca
+        self._versoes = {}
+        self._versoes_mes = {}
+        for g in self.gastos.values():
+            self._por_mes.setdefault(g["mes"], {})[g["id"]] = g
+            self._somar(g, 1)
+
+    def atualizar(self) -> int:
+        """Aplica as alterações feitas desde a marca d'água e retorna quantas foram."""
+        alteracoes = obter_alteracoes(self.marca)
+        if any(a["operacao"] == "RESTAURACAO" for a in alteracoes):
+            # O banco foi substituído por um snapshot: os deltas não se aplicam.
+            self.carregar()
+            return len(alteracoes)
+        for alteracao in alteracoes:
+            self._aplicar(alteracao)
+            self.marca = alteracao["seq"]
+            self._versoes[alteracao["tabela"]] = self.marca
+        return len(alteracoes)
+
+    def _aplicar(self, alteracao: dict) -> None:
+        tabela, dados = alteracao["tabela"], alteracao["dados"]
+        if tabela == "gastos":
+            gasto_id = int(alteracao["chave"])
+            antigo = self.gastos.get(gasto_id)
+            for g in (antigo, dados):
+                if g is not None:
+                    self._versoes_mes[g["mes"]] = alteracao["seq"]
+            if antigo is not None:
+                self._somar(antigo, -1)
+            if dados is None:
+                if antigo is not None:
+                    del self.gastos[gasto_id]
+                    self._por_mes.get(antigo["mes"], {}).pop(gasto_id, None)
+                return
+            if antigo is None:
+                self.gastos[gasto_id] = dados
+                self._por_mes.setdefault(dados["mes"], {})[gasto_id] = dados
+            else:
+                # Edição: mantém a posição do gasto na lista do mês.
+                if dados["mes"] != antigo["mes"]:
+                    self._por_mes.get(antigo["mes"], {}).pop(gasto_id, None)
+                    self._por_mes.setdefault(dados["mes"], {})[gasto_id] = antigo
+                antigo.update(dados)
+                dados = antigo
+            self._somar(dados, 1)
+        elif tabela == "metas":
+            if dados is None:
+                self.metas.pop(alteracao["chave"], None)
+            else:
+                self.metas[dados["mes"]] = dados["valor_meta"]
+        elif tabela == "configuracoes":
+            if dados is None:
+                self.configuracoes.pop(alteracao["chave"], None)
+            else:
+                self.configuracoes[dados["chave"]] = dados["valor"]
+
+    def _somar(self, gasto: dict, sinal: int) -> None:
+        totais = self._totais.setdefault(gasto["mes"], {"Fixo": 0.0, "Variável": 0.0})
+        totais[gasto["tipo"]] = totais.get(gasto["tipo"], 0.0) + sinal * gasto["valor"]
+
+    def versao(self, tabela: str, mes: Optional[str] = None) -> int:
+        """Sequência da última alteração na tabela ou, com ``mes``, nos gastos do mês."""
+        if mes is not None:
+            return self._versoes_mes.get(mes, self._base)
+        return self._versoes.get(tabela, self._base)
+
+    # --- Consultas ---
+
+    def gastos_mes(self, mes: str) -> list[dict]:
+        """Gastos do mês, na ordem de cadastro."""
+        return list(self._por_mes.get(mes, {}).values())
+
+    def todos_gastos(self) -> list[dict]:
+        return list(self.gastos.values())
+
+    def somar_por_tipo(self, mes: str) -> tuple[float, float, float]:
+        """Totais do mês por tipo (Fixo/Variável) e o total geral."""
+        totais = self._totais.get(mes, {})
+        # Arredonda para não exibir resíduos das somas incrementais (ex.: -0.00).
+        fixos = round(totais.get("Fixo", 0.0), 2) + 0.0
+        variaveis = round(totais.get("Variável", 0.0), 2) + 0.0
+        return fixos, variaveis, round(fixos + variaveis, 2) + 0.0
+
+    def totais_mensais(self) -> dict[str, float]:
+        return {m: self.somar_por_tipo(m)[2] for m in MESES}
+
+    def meta(self, mes: str) -> Optional[float]:
+        return self.metas.get(mes)
+
+    def configuracao(self, chave: str, padrao: str = "0") -> str:
+        return self.configuracoes.get(chave, padrao)
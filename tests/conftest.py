@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import database
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Aponta o módulo de banco para um arquivo SQLite temporário."""
+    caminho = str(tmp_path / "financeiro.db")
+    monkeypatch.setattr(database, "DB_PATH", caminho)
+    return caminho
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+
+import api
+from src import database
+
+
+async def _requisitar(porta: int, cabecalhos: str, corpo: bytes = b"") -> tuple[int, dict]:
+    leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+    escritor.write(cabecalhos.encode("latin-1") + corpo)
+    await escritor.drain()
+    resposta = await leitor.read()
+    escritor.close()
+    cabeca, _, conteudo = resposta.partition(b"\r\n\r\n")
+    return int(cabeca.split()[1]), json.loads(conteudo)
+
+
+async def _post(porta: int, caminho: str, dados) -> tuple[int, dict]:
+    corpo = json.dumps(dados).encode("utf-8")
+    return await _requisitar(
+        porta,
+        f"POST {caminho} HTTP/1.1\r\nContent-Length: {len(corpo)}\r\nConnection: close\r\n\r\n",
+        corpo,
+    )
+
+
+def _com_servico(teste):
+    """Roda ``teste(servico, porta)`` com o serviço e a gravadora ativos."""
+    async def executar():
+        servico = api.ServicoIngestao()
+        gravadora = asyncio.create_task(servico.gravadora())
+        servidor = await asyncio.start_server(servico.atender, "127.0.0.1", 0)
+        porta = servidor.sockets[0].getsockname()[1]
+        try:
+            return await teste(servico, porta)
+        finally:
+            servidor.close()
+            await servidor.wait_closed()
+            gravadora.cancel()
+
+    return asyncio.run(executar())
+
+
+def _gasto(**campos) -> dict:
+    gasto = {"mes": "Março", "tipo": "Variável", "categoria": "Lazer", "descricao": "Cinema", "valor": 42.0}
+    gasto.update(campos)
+    return gasto
+
+
+@pytest.mark.parametrize("valor", ["nan", "NaN", "Infinity", "-inf"])
+def test_valor_nao_finito_e_rejeitado(banco, valor):
+    async def teste(servico, porta):
+        return await _post(porta, "/gastos", _gasto(valor=valor))
+
+    status, resposta = _com_servico(teste)
+    assert status == 400
+    assert "finito" in resposta["erro"]
+
+
+@pytest.mark.parametrize("tamanho", ["abc", "-5"])
+def test_content_length_invalido_responde_400(banco, tamanho):
+    async def teste(servico, porta):
+        return await _requisitar(porta, f"POST /gastos HTTP/1.1\r\nContent-Length: {tamanho}\r\n\r\n")
+
+    status, resposta = _com_servico(teste)
+    assert status == 400
+    assert "Content-Length" in resposta["erro"]
+
+
+def test_gasto_invalido_nao_derruba_o_lote_dos_outros(banco):
+    async def teste(servico, porta):
+        # Um gasto que passa direto para a fila e viola NOT NULL no banco.
+        invalido = _gasto(valor=None)
+        validos = [[api._validar_gasto(_gasto(descricao=f"Cliente {i}"))] for i in range(20)]
+        return await asyncio.gather(
+            servico.enfileirar([invalido]),
+            *(servico.enfileirar(g) for g in validos),
+            return_exceptions=True,
+        )
+
+    resultados = _com_servico(teste)
+    assert isinstance(resultados[0], Exception)
+    assert all(isinstance(r, list) and len(r) == 1 for r in resultados[1:])
+    assert len(database.obter_gastos_mes("Março")) == 20
+
+
+@pytest.mark.parametrize("campos", [
+    {"descricao": None},
+    {"descricao": 123},
+    {"descricao": "   "},
+    {"valor": True},
+    {"valor": False},
+    {"valor": None},
+    {"valor": [10]},
+    {"valor": "dez"},
+])
+def test_campos_com_tipo_invalido_sao_rejeitados(campos):
+    with pytest.raises(api.ErroRequisicao) as erro:
+        api._validar_gasto(_gasto(**campos))
+    assert erro.value.status == 400
+
+
+@pytest.mark.parametrize("valor, esperado", [(10, 10.0), (12.5, 12.5), ("7.25", 7.25)])
+def test_valor_numerico_ou_texto_numerico_e_aceito(valor, esperado):
+    assert api._validar_gasto(_gasto(valor=valor))["valor"] == esperado
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src import backup, database
+
+
+def _semear(quantidade: int) -> None:
+    database.adicionar_gastos_em_lote([
+        {"mes": "Janeiro", "tipo": "Variável", "categoria": "Outros", "descricao": f"Semente {i}", "valor": 10.0}
+        for i in range(quantidade)
+    ])
+
+
+def test_snapshot_nao_perde_nem_bloqueia_insercoes_concorrentes(banco, tmp_path):
+    _semear(20000)
+    destino_dir = str(tmp_path / "snapshots")
+    parar = threading.Event()
+    inseridos, latencias = [], []
+
+    def escrever() -> None:
+        i = 0
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            inseridos.append(database.adicionar_gasto("Fevereiro", "Fixo", "Outros", f"Concorrente {i}", 1.0))
+            latencias.append(time.perf_counter() - inicio)
+            i += 1
+
+    escritor = threading.Thread(target=escrever)
+    escritor.start()
+    try:
+        time.sleep(0.05)
+        caminho = backup.criar_snapshot(destino_dir, paginas_por_passo=4, pausa=0.001)
+        time.sleep(0.05)
+    finally:
+        parar.set()
+        escritor.join()
+
+    assert inseridos
+    conn = sqlite3.connect(banco)
+    ids = {r[0] for r in conn.execute("SELECT id FROM gastos WHERE mes = 'Fevereiro'")}
+    conn.close()
+    assert ids == set(inseridos)
+
+    snapshot = sqlite3.connect(caminho)
+    assert snapshot.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert snapshot.execute("SELECT COUNT(*) FROM gastos WHERE mes = 'Janeiro'").fetchone()[0] == 20000
+    snapshot.close()
+
+    assert max(latencias) < 0.5
+    assert os.listdir(destino_dir) == [os.path.basename(caminho)]
+
+
+class _OrigemComFalha:
+    """Conexão de origem cujo backup falha no meio da cópia."""
+
+    def execute(self, *args):
+        return self
+
+    def fetchone(self):
+        return (0,)
+
+    def backup(self, destino, **kwargs):
+        destino.execute("CREATE TABLE parcial (x)")
+        destino.commit()
+        raise sqlite3.OperationalError("disk I/O error")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_snapshot_com_falha_remove_arquivo_temporario(banco, tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "get_connection", _OrigemComFalha)
+    destino_dir = str(tmp_path / "snapshots")
+
+    with pytest.raises(sqlite3.OperationalError):
+        backup.criar_snapshot(destino_dir)
+
+    assert os.listdir(destino_dir) == []
+
+
+def test_erro_em_segundo_plano_fica_registrado(banco, tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "get_connection", _OrigemComFalha)
+
+    backup.criar_snapshot_em_segundo_plano(str(tmp_path / "snapshots")).join()
+
+    estado = backup.estado_snapshot_em_segundo_plano()
+    assert estado["concluido"]
+    assert estado["caminho"] is None
+    assert "disk I/O error" in estado["erro"]
+
+
+def test_snapshot_pausa_entre_os_passos(banco, tmp_path, monkeypatch):
+    _semear(2000)
+    pausas = []
+    monkeypatch.setattr(backup.time, "sleep", pausas.append)
+
+    backup.criar_snapshot(str(tmp_path / "snapshots"), paginas_por_passo=2, pausa=0.01)
+
+    assert len(pausas) > 5
+    assert set(pausas) == {0.01}
@@ -0,0 +1,73 @@
+import sqlite3
+
+from src import backup, database
+from src.importador import importar_extrato
+
+CSV = """data,descricao,valor
+05/03/2026,Padaria,-12.50
+06/03/2026,Farmácia,-30.00
+07/03/2026,Mercado,-80.10
+""".encode("utf-8")
+
+
+def test_reimportar_extrato_conta_apenas_os_gastos(banco):
+    primeira = importar_extrato(CSV, "extrato.csv")
+    segunda = importar_extrato(CSV, "extrato.csv")
+
+    assert (primeira["inseridos"], primeira["duplicados"]) == (3, 0)
+    assert (segunda["inseridos"], segunda["duplicados"]) == (0, 3)
+    assert len(database.obter_gastos_mes("Março")) == 3
+
+
+def test_edicao_de_configuracao_e_meta_registra_valor_anterior(banco):
+    database.salvar_configuracao("salario", "1000")
+    database.salvar_configuracao("salario", "2000")
+    database.salvar_meta("Abril", 500.0)
+    database.salvar_meta("Abril", 650.0)
+
+    alteracoes = database.obter_alteracoes()
+    operacoes = [(a["tabela"], a["operacao"]) for a in alteracoes]
+    assert operacoes == [
+        ("configuracoes", "INSERT"), ("configuracoes", "UPDATE"),
+        ("metas", "INSERT"), ("metas", "UPDATE"),
+    ]
+    assert alteracoes[1]["anterior"] == {"chave": "salario", "valor": "1000"}
+    assert alteracoes[1]["dados"] == {"chave": "salario", "valor": "2000"}
+    assert alteracoes[3]["anterior"] == {"mes": "Abril", "valor_meta": 500.0}
+    assert database.obter_configuracao("salario") == "2000"
+    assert database.obter_meta("Abril") == 650.0
+
+
+def test_esquema_preparado_uma_vez_por_banco(banco, monkeypatch):
+    database.get_connection().close()
+    chamadas = []
+    monkeypatch.setattr(database, "_criar_tabelas", chamadas.append)
+
+    for _ in range(3):
+        database.get_connection().close()
+    assert chamadas == []
+
+    database.invalidar_esquema()
+    database.get_connection().close()
+    assert len(chamadas) == 1
+
+
+def test_restaurar_snapshot_antigo_recria_gatilhos(banco, tmp_path):
+    antigo = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(antigo)
+    conn.execute("""CREATE TABLE gastos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, mes TEXT NOT NULL, tipo TEXT NOT NULL,
+        categoria TEXT NOT NULL DEFAULT 'Outros', descricao TEXT NOT NULL, valor REAL NOT NULL,
+        criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.execute("INSERT INTO gastos (mes, tipo, descricao, valor) VALUES ('Maio', 'Fixo', 'Aluguel', 900)")
+    conn.commit()
+    conn.close()
+    database.adicionar_gasto("Junho", "Fixo", "Outros", "Atual", 1.0)
+
+    backup.restaurar_snapshot(antigo)
+    database.adicionar_gasto("Maio", "Variável", "Lazer", "Cinema", 30.0)
+
+    assert [a["operacao"] for a in database.obter_alteracoes(tabela="gastos")] == ["INSERT"]
+    assert database.avaliar_orcamentos() == []
+    database.salvar_orcamento("Maio", "Outros", 1000.0)
+    assert database.avaliar_orcamentos("Maio")[0]["gasto"] == 900.0
@@ -0,0 +1,71 @@
+import io
+
+import pandas as pd
+import pytest
+
+from src import database
+from src.importador import calcular_hashes, importar_extrato, ler_csv
+
+CSV_CONTA = """Data,Valor,Identificador,Descrição
+05/03/2026,-25.00,abc-1,Padaria
+06/03/2026,-25.00,,Farmácia
+07/03/2026,-25.00,,Estacionamento
+08/03/2026,-40.00,abc-2,Mercado
+""".encode("utf-8")
+
+
+def test_linhas_sem_identificador_ficam_sem_id():
+    extrato = ler_csv(CSV_CONTA)
+    assert extrato["id_banco"].isna().tolist() == [False, True, True, False]
+
+
+def test_transacoes_sem_id_com_mesmo_valor_nao_colidem():
+    extrato = ler_csv(CSV_CONTA)
+    assert calcular_hashes(extrato).nunique() == len(extrato)
+
+
+def test_identificador_textual_nan_conta_como_ausente():
+    # No pandas 2.x, astype(str) transforma as células vazias em "nan".
+    extrato = pd.DataFrame({
+        "data": pd.to_datetime(["2026-03-05", "2026-03-06", "2026-03-07"]),
+        "descricao": ["Farmácia", "Estacionamento", "Padaria"],
+        "valor": [25.0, 25.0, 25.0],
+        "id_banco": ["nan", "nan", "abc-1"],
+    })
+    assert calcular_hashes(extrato).nunique() == 3
+
+
+def test_importar_extrato_grava_todas_as_transacoes_sem_id(banco):
+    importar_extrato(CSV_CONTA, "extrato.csv")
+
+    descricoes = sorted(g["descricao"] for g in database.obter_gastos_mes("Março"))
+    assert descricoes == ["Estacionamento", "Farmácia", "Mercado", "Padaria"]
+
+
+def test_restauracao_de_backup_mantem_hashes_do_extrato(banco):
+    importar_extrato(CSV_CONTA, "extrato.csv")
+    backup_csv = pd.DataFrame(database.obter_todos_gastos()).to_csv(index=False)
+
+    restaurados = pd.read_csv(io.StringIO(backup_csv)).to_dict("records")
+    database.importar_gastos(restaurados)
+    resultado = importar_extrato(CSV_CONTA, "extrato.csv")
+
+    assert resultado["inseridos"] == 0
+    assert resultado["duplicados"] == 4
+    assert len(database.obter_gastos_mes("Março")) == 4
+
+
+@pytest.mark.parametrize("conteudo", [
+    b"data,descricao,valor\n",
+    b"data,descricao,valor\nontem,Padaria,-10.00\nhoje,Mercado,-20.00\n",
+    b"data,descricao,valor\n05/03/2026,Padaria,abc\n",
+])
+def test_extrato_sem_transacoes_validas_gera_erro_claro(banco, conteudo):
+    with pytest.raises(ValueError, match="Nenhuma transação"):
+        importar_extrato(conteudo, "extrato.csv")
+    assert database.obter_todos_gastos() == []
+
+
+def test_extrato_so_com_creditos_nao_importa_nada(banco):
+    resultado = importar_extrato(b"data,descricao,valor\n05/03/2026,Salario,5000.00\n", "extrato.csv")
+    assert resultado == {"lidos": 1, "despesas": 0, "inseridos": 0, "duplicados": 0}
@@ -0,0 +1,130 @@
+import sqlite3
+
+import pytest
+
+from src import backup, database
+from src.constantes import MESES
+from src.livro import Livro
+
+
+@pytest.fixture
+def outra_conexao(banco):
+    """Conexão separada, como a de outra sessão ou da API."""
+    database.get_connection().close()
+    conn = sqlite3.connect(banco)
+    yield conn
+    conn.close()
+
+
+def _gravar(conn, sql, *parametros):
+    conn.execute(sql, parametros)
+    conn.commit()
+
+
+def _conferir(livro: Livro) -> None:
+    """O livro atualizado por deltas deve bater com um livro carregado do zero."""
+    novo = Livro()
+    assert livro.marca == novo.marca
+    for mes in MESES:
+        assert livro.gastos_mes(mes) == novo.gastos_mes(mes)
+        assert livro.somar_por_tipo(mes) == novo.somar_por_tipo(mes)
+    assert livro.metas == novo.metas
+    assert livro.configuracoes == novo.configuracoes
+
+
+def _semear():
+    database.adicionar_gasto("Março", "Fixo", "Moradia", "Aluguel", 900.0)
+    database.adicionar_gasto("Março", "Variável", "Mercado", "Feira", 120.0)
+    database.adicionar_gasto("Abril", "Variável", "Lazer", "Cinema", 40.0)
+    database.salvar_meta("Março", 1500.0)
+    database.salvar_configuracao("salario", "3000")
+
+
+def test_atualizar_aplica_insercoes_de_outra_conexao(outra_conexao):
+    _semear()
+    livro = Livro()
+
+    _gravar(outra_conexao, "INSERT INTO gastos (mes, tipo, categoria, descricao, valor) VALUES (?, ?, ?, ?, ?)",
+            "Março", "Variável", "Mercado", "Padaria", 15.5)
+    _gravar(outra_conexao, "INSERT INTO metas (mes, valor_meta) VALUES (?, ?)", "Abril", 800.0)
+    _gravar(outra_conexao, "INSERT INTO configuracoes (chave, valor) VALUES (?, ?)", "alerta_atencao", "70")
+
+    assert livro.atualizar() == 3
+    assert livro.somar_por_tipo("Março") == (900.0, 135.5, 1035.5)
+    _conferir(livro)
+
+
+def test_atualizar_aplica_edicoes(outra_conexao):
+    _semear()
+    livro = Livro()
+    aluguel, feira = (g["id"] for g in livro.gastos_mes("Março"))
+    versao_abril = livro.versao("gastos", "Abril")
+
+    _gravar(outra_conexao, "UPDATE gastos SET valor = ?, tipo = ? WHERE id = ?", 950.0, "Fixo", aluguel)
+    _gravar(outra_conexao, "UPDATE gastos SET mes = ?, tipo = ? WHERE id = ?", "Maio", "Fixo", feira)
+    _gravar(outra_conexao, "UPDATE metas SET valor_meta = ? WHERE mes = ?", 1600.0, "Março")
+    _gravar(outra_conexao, "UPDATE configuracoes SET valor = ? WHERE chave = ?", "3200", "salario")
+
+    livro.atualizar()
+    assert [g["descricao"] for g in livro.gastos_mes("Março")] == ["Aluguel"]
+    assert livro.somar_por_tipo("Maio") == (120.0, 0.0, 120.0)
+    assert livro.meta("Março") == 1600.0
+    assert livro.configuracao("salario") == "3200"
+    _conferir(livro)
+
+    # A edição que moveu a feira conta para os dois meses; Abril não mudou.
+    seq_feira = database.obter_alteracoes(tabela="gastos")[-1]["seq"]
+    assert livro.versao("gastos", "Março") == seq_feira
+    assert livro.versao("gastos", "Maio") == seq_feira
+    assert livro.versao("gastos", "Abril") == versao_abril
+    assert livro.versao("configuracoes") == livro.marca
+
+
+def test_atualizar_aplica_remocoes(outra_conexao):
+    _semear()
+    livro = Livro()
+    cinema = livro.gastos_mes("Abril")[0]["id"]
+
+    _gravar(outra_conexao, "DELETE FROM gastos WHERE id = ?", cinema)
+    _gravar(outra_conexao, "DELETE FROM metas WHERE mes = ?", "Março")
+
+    livro.atualizar()
+    assert livro.gastos_mes("Abril") == []
+    assert livro.somar_por_tipo("Abril") == (0.0, 0.0, 0.0)
+    assert livro.meta("Março") is None
+    assert livro.versao("gastos", "Abril") < livro.versao("metas") == livro.marca
+    _conferir(livro)
+
+
+def test_atualizar_depois_de_limpar_tudo(banco):
+    _semear()
+    livro = Livro()
+
+    database.limpar_tudo()
+
+    livro.atualizar()
+    assert livro.todos_gastos() == []
+    assert livro.totais_mensais() == {m: 0.0 for m in MESES}
+    assert livro.metas == {} and livro.configuracoes == {}
+    for tabela in ("gastos", "metas", "configuracoes"):
+        assert livro.versao(tabela) == database.obter_alteracoes(tabela=tabela)[-1]["seq"]
+    assert livro.versao("gastos", "Abril") > livro.versao("gastos", "Março")
+    _conferir(livro)
+
+
+def test_atualizar_depois_de_restaurar_snapshot_recarrega(banco, tmp_path):
+    _semear()
+    caminho = backup.criar_snapshot(str(tmp_path / "snapshots"))
+    livro = Livro()
+
+    database.adicionar_gasto("Março", "Variável", "Lazer", "Show", 200.0)
+    database.salvar_meta("Março", 2000.0)
+    livro.atualizar()
+    backup.restaurar_snapshot(caminho)
+
+    livro.atualizar()
+    assert [g["descricao"] for g in livro.gastos_mes("Março")] == ["Aluguel", "Feira"]
+    assert livro.meta("Março") == 1500.0
+    # Carga completa: todas as versões passam a ser a marca atual.
+    assert livro.versao("gastos", "Março") == livro.versao("metas") == livro.marca
+    _conferir(livro)
@@ -0,0 +1,85 @@
+import sqlite3
+
+from src import database
+
+
+def _totais() -> dict[tuple[str, str], tuple[float, int]]:
+    conn = database.get_connection()
+    rows = conn.execute("SELECT mes, categoria, total, quantidade FROM totais_categoria").fetchall()
+    conn.close()
+    return {(r["mes"], r["categoria"]): (round(r["total"], 2), r["quantidade"]) for r in rows}
+
+
+def _avaliacao(mes: str) -> dict:
+    return {a["categoria"]: a for a in database.avaliar_orcamentos(mes)}
+
+
+def test_edicao_move_valor_entre_categorias(banco):
+    padaria = database.adicionar_gasto("Março", "Variável", "Mercado", "Padaria", 20.0)
+    database.adicionar_gasto("Março", "Variável", "Mercado", "Feira", 80.0)
+
+    database.editar_gasto(padaria, "Variável", "Lazer", "Padaria", 25.0)
+    assert _totais() == {("Março", "Mercado"): (80.0, 1), ("Março", "Lazer"): (25.0, 1)}
+
+    database.editar_gasto(padaria, "Variável", "Lazer", "Padaria", 40.0)
+    assert _totais()[("Março", "Lazer")] == (40.0, 1)
+
+
+def test_remover_ultimo_gasto_apaga_total_da_categoria(banco):
+    cinema = database.adicionar_gasto("Abril", "Variável", "Lazer", "Cinema", 30.0)
+    database.adicionar_gasto("Abril", "Fixo", "Moradia", "Aluguel", 900.0)
+    database.salvar_orcamento("Abril", "Lazer", 100.0)
+
+    database.remover_gasto(cinema)
+
+    assert _totais() == {("Abril", "Moradia"): (900.0, 1)}
+    assert _avaliacao("Abril")["Lazer"]["gasto"] == 0.0
+
+
+def test_banco_antigo_recebe_totais_na_migracao(banco):
+    conn = sqlite3.connect(banco)
+    conn.execute("""CREATE TABLE gastos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, mes TEXT NOT NULL, tipo TEXT NOT NULL,
+        categoria TEXT NOT NULL DEFAULT 'Outros', descricao TEXT NOT NULL, valor REAL NOT NULL,
+        criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.executemany(
+        "INSERT INTO gastos (mes, tipo, categoria, descricao, valor) VALUES (?, ?, ?, ?, ?)",
+        [("Maio", "Fixo", "Moradia", "Aluguel", 900.0),
+         ("Maio", "Variável", "Mercado", "Feira", 50.0),
+         ("Maio", "Variável", "Mercado", "Padaria", 12.5)],
+    )
+    conn.commit()
+    conn.close()
+
+    assert _totais() == {("Maio", "Moradia"): (900.0, 1), ("Maio", "Mercado"): (62.5, 2)}
+    database.adicionar_gasto("Maio", "Variável", "Mercado", "Açougue", 37.5)
+    assert _totais()[("Maio", "Mercado")] == (100.0, 3)
+
+
+def test_alertas_configurados_definem_o_status(banco):
+    database.adicionar_gasto("Junho", "Variável", "Mercado", "Feira", 60.0)
+    database.adicionar_gasto("Junho", "Variável", "Lazer", "Show", 95.0)
+    database.salvar_meta("Junho", 200.0)
+    database.salvar_orcamento("Junho", "Mercado", 100.0)
+    database.salvar_orcamento("Junho", "Lazer", 100.0)
+
+    padrao = _avaliacao("Junho")
+    assert [padrao[c]["status"] for c in (None, "Mercado", "Lazer")] == ["ok", "ok", "atencao"]
+
+    database.salvar_configuracao("alerta_atencao", "50")
+    database.salvar_configuracao("alerta_excedido", "90")
+    ajustado = _avaliacao("Junho")
+    assert [ajustado[c]["status"] for c in (None, "Mercado", "Lazer")] == ["atencao", "atencao", "excedido"]
+    assert ajustado[None]["percentual"] == 77.5
+
+
+def test_limite_zero(banco):
+    database.salvar_orcamento("Julho", "Lazer", 0.0)
+    database.salvar_orcamento("Julho", "Mercado", 0.0)
+    database.adicionar_gasto("Julho", "Variável", "Lazer", "Cinema", 10.0)
+
+    avaliacao = _avaliacao("Julho")
+    assert avaliacao["Lazer"]["percentual"] is None
+    assert avaliacao["Lazer"]["status"] == "excedido"
+    assert avaliacao["Lazer"]["restante"] == -10.0
+    assert avaliacao["Mercado"]["status"] == "ok"